@@ -1,7 +1,92 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from . import models
+from .text import text_hash
 
-admin.site.register(models.User)
-admin.site.register(models.Profile)
-admin.site.register(models.Phrase)
-admin.site.register(models.Comment)
+
+def estimated_row_count(model, using):
+    """The row count the database keeps in its statistics, or None where there is no cheap estimate."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute('SELECT table_rows FROM information_schema.tables '
+                           'WHERE table_schema = DATABASE() AND table_name = %s', [model._meta.db_table])
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [model._meta.db_table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+        # Stop counting at the limit, so a broad filter on a big table does not scan all of it.
+        return queryset.order_by()[:limit].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # uuid7 keys are time ordered, so this is newest first straight off the primary key.
+    ordering = ('-id',)
+
+
+@admin.register(models.User)
+class UserAdmin(LargeTableAdmin):
+    list_display = ('username', 'email', 'is_active', 'is_staff')
+    search_fields = ('=email', '^username')
+
+
+@admin.register(models.Profile)
+class ProfileAdmin(LargeTableAdmin):
+    list_display = ('user', 'sex', 'date_of_birth', 'created_at')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    search_fields = ('=user__email',)
+
+
+@admin.register(models.Phrase)
+class PhraseAdmin(LargeTableAdmin):
+    list_display = ('text', 'user', 'text_language', 'translated_word_language', 'created_at')
+    list_select_related = ('user',)
+    list_filter = ('text_language', 'translated_word_language')
+    autocomplete_fields = ('user',)
+    search_fields = ('=user__email',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # text is not indexed; an exact phrase is found through text_hash instead of LIKE '%...%'.
+        results, use_distinct = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results |= queryset.filter(text_hash=text_hash(search_term))
+        return results, use_distinct
+
+
+@admin.register(models.Comment)
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('text', 'user', 'phrase', 'created_at')
+    list_select_related = ('user', 'phrase')
+    autocomplete_fields = ('user', 'phrase')
+    search_fields = ('=user__email',)
+
+
+@admin.register(models.UserPurge)
+class UserPurgeAdmin(LargeTableAdmin):
+    list_display = ('user_id', 'status', 'deleted_rows', 'attempts', 'next_attempt_at')
+    list_filter = ('status',)
+
+
+@admin.register(models.OutboxEmail)
+class OutboxEmailAdmin(LargeTableAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
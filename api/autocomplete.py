@@ -0,0 +1,187 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min
+from .kana import katakana_to_hiragana, romaji_to_hiragana
+from .models import Phrase
+from .text import normalize_text
+
+AUTOCOMPLETE_VERSION_KEY = 'autocomplete:version'
+# Prefixes this short match too much of the index to rank on every keystroke,
+# so their top suggestions are precomputed.
+SHORT_PREFIX_LENGTH = 2
+
+
+def autocomplete_key(value):
+    return katakana_to_hiragana(normalize_text(value))
+
+
+class PrefixIndex:
+    def __init__(self, entries=(), top_size=20):
+        self.top_size = top_size
+        # add() and remove() shift the parallel lists in place, so every read and write goes through this lock.
+        self.lock = threading.Lock()
+        weights = {}
+        texts = {}
+        for text, weight in entries:
+            key = autocomplete_key(text)
+            if not key:
+                continue
+            weights[key] = weights.get(key, 0) + weight
+            texts.setdefault(key, text)
+
+        self.keys = sorted(weights)
+        self.weights = [weights[key] for key in self.keys]
+        self.texts = [texts[key] for key in self.keys]
+        self.top = {}
+        for position, key in enumerate(self.keys):
+            for prefix in self.short_prefixes(key):
+                self.top.setdefault(prefix, []).append(position)
+        for prefix, positions in self.top.items():
+            self.top[prefix] = [self.keys[position] for position in
+                                heapq.nlargest(self.top_size, positions, key=self.weights.__getitem__)]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def short_prefixes(self, key):
+        return [key[:length] for length in range(1, min(len(key), SHORT_PREFIX_LENGTH) + 1)]
+
+    def add(self, text, weight=1):
+        key = autocomplete_key(text)
+        if not key:
+            return
+        with self.lock:
+            position = bisect_left(self.keys, key)
+            if position < len(self.keys) and self.keys[position] == key:
+                self.weights[position] += weight
+            else:
+                self.keys.insert(position, key)
+                self.weights.insert(position, weight)
+                self.texts.insert(position, text)
+
+            for prefix in self.short_prefixes(key):
+                top_keys = [other for other in self.top.get(prefix, []) if other != key] + [key]
+                self.top[prefix] = heapq.nlargest(self.top_size, top_keys, key=self.weight_of)
+
+    def remove(self, text, weight=1):
+        key = autocomplete_key(text)
+        if not key:
+            return
+        with self.lock:
+            position = bisect_left(self.keys, key)
+            if position == len(self.keys) or self.keys[position] != key:
+                return
+            self.weights[position] -= weight
+            if self.weights[position] <= 0:
+                del self.keys[position]
+                del self.weights[position]
+                del self.texts[position]
+
+            # A lower weight can let a key outside the precomputed top overtake this one, so rank those prefixes again.
+            for prefix in self.short_prefixes(key):
+                if key in self.top.get(prefix, ()):
+                    positions = self.prefix_range(prefix)
+                    self.top[prefix] = [self.keys[other] for other in
+                                        heapq.nlargest(self.top_size, positions, key=self.weights.__getitem__)]
+                    if not self.top[prefix]:
+                        del self.top[prefix]
+
+    def weight_of(self, key):
+        return self.weights[bisect_left(self.keys, key)]
+
+    def prefix_range(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        return range(start, bisect_left(self.keys, prefix + '\U0010ffff', lo=start))
+
+    def search(self, prefix, limit=10):
+        with self.lock:
+            if len(prefix) <= SHORT_PREFIX_LENGTH and prefix in self.top:
+                positions = [bisect_left(self.keys, key) for key in self.top[prefix][:limit]]
+            else:
+                positions = heapq.nlargest(limit, self.prefix_range(prefix), key=self.weights.__getitem__)
+            return [(self.texts[position], self.weights[position]) for position in positions]
+
+    def suggest(self, value, limit=10):
+        key = autocomplete_key(value)
+        if not key:
+            return []
+        results = dict(self.search(key, limit))
+        kana = romaji_to_hiragana(key)
+        if kana:
+            for text, weight in self.search(kana, limit):
+                results.setdefault(text, weight)
+        return heapq.nlargest(limit, results.items(), key=lambda item: item[1])
+
+    @classmethod
+    def from_db(cls):
+        # Popularity is the number of phrases, across all users, with the same normalized text.
+        rows = Phrase.objects.values('text_hash').annotate(weight=Count('id'), text=Min('text')).order_by()
+        return cls((row['text'], row['weight']) for row in rows)
+
+
+_index = None
+_index_version = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_index():
+    global _index, _index_version, _checked_at
+
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < settings.AUTOCOMPLETE_REFRESH_SECONDS:
+        return _index
+
+    # While one thread rebuilds, the others keep answering from the index they already have.
+    if not _lock.acquire(blocking=_index is None):
+        return _index
+    try:
+        version = cache.get(AUTOCOMPLETE_VERSION_KEY, 0)
+        if _index is None or version != _index_version:
+            _index = PrefixIndex.from_db()
+            _index_version = version
+        _checked_at = now
+        return _index
+    finally:
+        _lock.release()
+
+
+def apply_change(change):
+    """Apply a change to this worker's index right away; other workers pick it up on their next refresh."""
+    global _index_version
+
+    try:
+        version = cache.incr(AUTOCOMPLETE_VERSION_KEY)
+    except ValueError:
+        cache.set(AUTOCOMPLETE_VERSION_KEY, 1, timeout=None)
+        version = 1
+    with _lock:
+        if _index is None:
+            return
+        change(_index)
+        # Only adopt the new version if no other worker's write slipped in between.
+        if version == _index_version + 1:
+            _index_version = version
+
+
+def add_phrase(text):
+    apply_change(lambda index: index.add(text))
+
+
+def remove_phrase(text):
+    apply_change(lambda index: index.remove(text))
+
+
+def invalidate():
+    """Force a rebuild when a change cannot be applied in place."""
+    global _checked_at
+
+    try:
+        cache.incr(AUTOCOMPLETE_VERSION_KEY)
+    except ValueError:
+        cache.set(AUTOCOMPLETE_VERSION_KEY, 1, timeout=None)
+    _checked_at = 0.0
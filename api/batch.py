@@ -0,0 +1,100 @@
+import io
+import json
+import sys
+from urllib.parse import unquote_to_bytes
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.handlers.exception import convert_exception_to_response
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve, reverse
+from rest_framework import permissions
+
+API_PREFIX = '/api/'
+RESPONSE_HEADERS = ('Content-Type', 'ETag', 'Location', 'Idempotent-Replayed')
+# Headers of the batch request itself are not passed on; a sub-request sets these per entry.
+SUB_REQUEST_HEADERS = {
+    'if_none_match': 'HTTP_IF_NONE_MATCH',
+    'idempotency_key': 'HTTP_IDEMPOTENCY_KEY',
+}
+
+
+def build_sub_request(request, sub_request):
+    path, _, query_string = sub_request['path'].partition('?')
+    body = sub_request.get('body')
+    payload = json.dumps(body).encode() if body is not None else b''
+    # The outer request's host and scheme are kept so absolute URLs in sub-responses stay correct.
+    environ = {
+        'REQUEST_METHOD': sub_request['method'],
+        'SCRIPT_NAME': '',
+        # WSGI servers hand over PATH_INFO percent-decoded, as latin-1.
+        'PATH_INFO': unquote_to_bytes(path).decode('iso-8859-1'),
+        'QUERY_STRING': query_string,
+        'SERVER_NAME': request.META.get('SERVER_NAME', 'localhost'),
+        'SERVER_PORT': request.META.get('SERVER_PORT', '80'),
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': request.get_host(),
+        'REMOTE_ADDR': request.META.get('REMOTE_ADDR', ''),
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'https' if request.is_secure() else 'http',
+        'wsgi.input': io.BytesIO(payload),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for field, header in SUB_REQUEST_HEADERS.items():
+        if sub_request.get(field):
+            environ[header] = sub_request[field]
+    wsgi_request = WSGIRequest(environ)
+    # Reuse the user authenticated on the batch request instead of checking the JWT again.
+    if request.user.is_authenticated:
+        wsgi_request._force_auth_user = request.user
+        wsgi_request._force_auth_token = request.auth
+    return wsgi_request
+
+
+def response_body(response):
+    if hasattr(response, 'data'):
+        return response.data
+    if response.streaming or not response.content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content)
+    return response.content.decode(response.charset)
+
+
+def run_sub_request(request, sub_request):
+    path = sub_request['path']
+    if not path.startswith(API_PREFIX) or path.split('?', 1)[0] == reverse('api:batch'):
+        return {'status': 404, 'headers': {}, 'body': None}
+    try:
+        match = resolve(path.split('?', 1)[0])
+    except Resolver404:
+        return {'status': 404, 'headers': {}, 'body': None}
+
+    # Exceptions become error responses just as they would in the request handler.
+    view = convert_exception_to_response(lambda sub_request: match.func(sub_request, *match.args, **match.kwargs))
+    response = view(build_sub_request(request, sub_request))
+    headers = {key: value for key, value in response.items() if key in RESPONSE_HEADERS}
+    return {'status': response.status_code, 'headers': headers, 'body': response_body(response)}
+
+
+def run_in_worker(request, sub_request):
+    try:
+        return run_sub_request(request, sub_request)
+    finally:
+        # Connections opened by a pool thread are never reused by the request cycle.
+        connections.close_all()
+
+
+def run_batch(request, sub_requests, parallel=False):
+    # Writes always run in order, so a later sub-request can depend on an earlier one.
+    if not parallel or len(sub_requests) < 2 or \
+            any(sub_request['method'] not in permissions.SAFE_METHODS for sub_request in sub_requests):
+        return [run_sub_request(request, sub_request) for sub_request in sub_requests]
+
+    with ThreadPoolExecutor(max_workers=min(len(sub_requests), settings.BATCH_MAX_WORKERS)) as executor:
+        return list(executor.map(lambda sub_request: run_in_worker(request, sub_request), sub_requests))
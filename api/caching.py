@@ -0,0 +1,42 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags
+
+
+def login_user_cache_key(user_id):
+    return 'me:login_user:%s' % user_id
+
+
+def profile_cache_key(user_id):
+    return 'me:profile:%s' % user_id
+
+
+def make_etag(data):
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    return '"%s"' % hashlib.md5(body).hexdigest()
+
+
+def etag_matches(request, etag):
+    # Compressed responses carry a weak ETag, so compare weakly.
+    return etag in (tag[2:] if tag.startswith('W/') else tag
+                    for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')))
+
+
+def get_cached_representation(key, build):
+    cached = cache.get(key)
+    if cached is None:
+        data = dict(build())
+        cached = (data, make_etag(data))
+        cache.set(key, cached, settings.ME_CACHE_TIMEOUT)
+    return cached
+
+
+def invalidate_login_user(user_id):
+    cache.delete_many([login_user_cache_key(user_id), profile_cache_key(user_id)])
+
+
+def invalidate_profile(user_id):
+    cache.delete(profile_cache_key(user_id))
@@ -0,0 +1,84 @@
+import gzip
+import hashlib
+import zlib
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_CONTENT_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml')
+
+
+def available_encodings():
+    # In order of preference when the client accepts both equally.
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding):
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(response):
+    if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    return response.get('Content-Type', '').startswith(COMPRESSIBLE_CONTENT_TYPES)
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compressed_cache_key(content, encoding):
+    # Keyed on the body itself: one ETag can cover several renderings (JSON,
+    # indented JSON, the browsable API) of the same data.
+    return 'compressed:{}:{}'.format(encoding, hashlib.md5(content).hexdigest())
+
+
+def cached_compress(content, encoding):
+    key = compressed_cache_key(content, encoding)
+    body = cache.get(key)
+    if body is None:
+        body = compress(content, encoding)
+        cache.set(key, body, timeout=settings.COMPRESSION_CACHE_TIMEOUT)
+    return body
+
+
+def compress_stream(chunks, encoding):
+    """Compress each chunk as it is produced and flush it, so nothing is held back."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
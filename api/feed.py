@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.core.cache import cache
+from .caching import make_etag
+from .models import Phrase
+from .serializers import PhraseSerializer
+
+FEED_CACHE_KEY = 'feed:recent_phrases'
+
+
+def recent_phrases():
+    return (Phrase.objects
+            .select_related('user')
+            .prefetch_related('comments')
+            .order_by('-created_at', '-id')[:settings.FEED_SIZE])
+
+
+def load_feed():
+    cached = cache.get(FEED_CACHE_KEY)
+    return cached[0] if cached is not None else None
+
+
+def store_feed(entries):
+    # The ETag is kept with the entries so responses can be revalidated and their compressed body reused.
+    cached = (entries, make_etag(entries))
+    cache.set(FEED_CACHE_KEY, cached, timeout=None)
+    return cached
+
+
+def build_feed():
+    return store_feed([dict(entry) for entry in PhraseSerializer(recent_phrases(), many=True).data])
+
+
+def get_feed():
+    """Return the feed entries and their ETag."""
+    cached = cache.get(FEED_CACHE_KEY)
+    if cached is None:
+        cached = build_feed()
+    return cached
+
+
+def serialize_phrase(phrase_id):
+    phrase = Phrase.objects.select_related('user').prefetch_related('comments').filter(id=phrase_id).first()
+    return dict(PhraseSerializer(phrase).data) if phrase is not None else None
+
+
+# The buffer is read-modify-written as a whole. Concurrent writers may drop an
+# update, which the next rebuild (cache miss or deploy warm-up) repairs.
+def push_phrase(phrase_id):
+    entries = load_feed()
+    entry = serialize_phrase(phrase_id)
+    if entries is None or entry is None:
+        return
+    entries = [other for other in entries if other['id'] != entry['id']]
+    entries.insert(0, entry)
+    store_feed(entries[:settings.FEED_SIZE])
+
+
+def refresh_phrase(phrase_id):
+    entries = load_feed()
+    if entries is None:
+        return
+    for index, other in enumerate(entries):
+        if other['id'] == str(phrase_id):
+            entry = serialize_phrase(phrase_id)
+            if entry is None:
+                cache.delete(FEED_CACHE_KEY)
+                return
+            entries[index] = entry
+            store_feed(entries)
+            return
+
+
+def remove_phrase(phrase_id):
+    entries = load_feed()
+    if entries is not None and any(entry['id'] == str(phrase_id) for entry in entries):
+        # Dropping the buffer lets the next read refill it to FEED_SIZE from the database.
+        cache.delete(FEED_CACHE_KEY)
+
+
+def remove_user(user_id):
+    entries = load_feed()
+    if entries is not None and any(entry['user']['id'] == str(user_id) for entry in entries):
+        cache.delete(FEED_CACHE_KEY)
@@ -0,0 +1,32 @@
+import uuid
+from django.db import models
+
+
+class BinaryUUIDField(models.UUIDField):
+    """UUIDField stored as binary(16) on MySQL instead of char(32).
+
+    Other backends keep the column type of UUIDField. Python and API values are
+    uuid.UUID either way.
+    """
+
+    def get_internal_type(self):
+        return 'BinaryUUIDField'
+
+    def db_type(self, connection):
+        if connection.vendor == 'mysql':
+            return 'binary(16)'
+        return connection.data_types['UUIDField']
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if connection.vendor != 'mysql':
+            return super().get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return None
+        return self.to_python(value).bytes
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if isinstance(value, (bytes, bytearray)):
+            return uuid.UUID(bytes=bytes(value))
+        return uuid.UUID(value)
@@ -0,0 +1,68 @@
+import threading
+import time
+from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.db import DatabaseError, connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+
+_migration_nodes = None
+_readiness = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def check_databases():
+    for connection in connections.all():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+
+def check_migrations():
+    global _migration_nodes
+
+    connection = connections['default']
+    if _migration_nodes is None:
+        # The migration files cannot change under a running process, so they are only read once.
+        _migration_nodes = set(MigrationLoader(None, ignore_no_migrations=True).graph.nodes)
+    unapplied = _migration_nodes - set(MigrationRecorder(connection).applied_migrations())
+    if unapplied:
+        raise RuntimeError('{} unapplied migrations'.format(len(unapplied)))
+
+
+def check_storage():
+    get_storage_class()
+    if not settings.AWS_STORAGE_BUCKET_NAME:
+        raise RuntimeError('AWS_STORAGE_BUCKET_NAME is not set')
+
+
+READINESS_CHECKS = (
+    ('database', check_databases),
+    ('migrations', check_migrations),
+    ('storage', check_storage),
+)
+
+
+def run_checks():
+    results = {}
+    for name, check in READINESS_CHECKS:
+        try:
+            check()
+        except (DatabaseError, RuntimeError, ImportError) as e:
+            results[name] = str(e) or e.__class__.__name__
+        else:
+            results[name] = 'ok'
+    return results
+
+
+def readiness():
+    """Readiness check results, re-run at most once every READINESS_CACHE_SECONDS per process."""
+    global _readiness, _checked_at
+
+    now = time.monotonic()
+    if _readiness is None or now - _checked_at >= settings.READINESS_CACHE_SECONDS:
+        with _lock:
+            if _readiness is None or now - _checked_at >= settings.READINESS_CACHE_SECONDS:
+                _readiness = run_checks()
+                _checked_at = now
+    return _readiness
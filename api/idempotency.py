@@ -0,0 +1,64 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+IDEMPOTENCY_KEY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still in progress.'
+    default_code = 'idempotency_key_in_progress'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used for a different request.'
+    default_code = 'idempotency_key_reused'
+
+
+def idempotency_cache_key(user_pk, key):
+    # Hashed, so arbitrary client keys take a fixed, small amount of cache key space.
+    return 'idempotency:{}:{}'.format(user_pk.hex, hashlib.sha256(key.encode()).hexdigest()[:32])
+
+
+def request_fingerprint(request):
+    payload = json.dumps([request.method, request.path, request.data], sort_keys=True, default=str)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def idempotent_response(request, key, get_response):
+    """Run get_response once per user and key; later requests with the key get its response replayed."""
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise ValidationError({'idempotency_key': 'Ensure this header has no more than {} characters.'.format(
+            IDEMPOTENCY_KEY_MAX_LENGTH)})
+
+    cache_key = idempotency_cache_key(request.user.pk, key)
+    fingerprint = request_fingerprint(request)
+    stored = cache.get(cache_key)
+    if stored is None:
+        lock_key = cache_key + ':lock'
+        if not cache.add(lock_key, 1, timeout=settings.IDEMPOTENCY_LOCK_SECONDS):
+            raise IdempotencyKeyInProgress()
+        try:
+            # The first request may have finished between the get and the add.
+            stored = cache.get(cache_key)
+            if stored is None:
+                response = get_response()
+                # Server errors are not stored, so the client can retry them.
+                if response.status_code < 500:
+                    cache.set(cache_key, (fingerprint, response.status_code, response.data),
+                              timeout=settings.IDEMPOTENCY_KEY_TTL)
+                return response
+        finally:
+            cache.delete(lock_key)
+
+    stored_fingerprint, status_code, data = stored
+    if stored_fingerprint != fingerprint:
+        raise IdempotencyKeyReused()
+    return Response(data, status=status_code, headers={'Idempotent-Replayed': 'true'})
@@ -0,0 +1,81 @@
+import re
+
+ROMAJI_PATTERN = re.compile(r"[a-z'\-]+")
+
+ROMAJI_TO_HIRAGANA = {
+    'a': 'あ', 'i': 'い', 'u': 'う', 'e': 'え', 'o': 'お',
+    'ka': 'か', 'ki': 'き', 'ku': 'く', 'ke': 'け', 'ko': 'こ',
+    'sa': 'さ', 'shi': 'し', 'si': 'し', 'su': 'す', 'se': 'せ', 'so': 'そ',
+    'ta': 'た', 'chi': 'ち', 'ti': 'ち', 'tsu': 'つ', 'tu': 'つ', 'te': 'て', 'to': 'と',
+    'na': 'な', 'ni': 'に', 'nu': 'ぬ', 'ne': 'ね', 'no': 'の',
+    'ha': 'は', 'hi': 'ひ', 'fu': 'ふ', 'hu': 'ふ', 'he': 'へ', 'ho': 'ほ',
+    'ma': 'ま', 'mi': 'み', 'mu': 'む', 'me': 'め', 'mo': 'も',
+    'ya': 'や', 'yu': 'ゆ', 'yo': 'よ',
+    'ra': 'ら', 'ri': 'り', 'ru': 'る', 're': 'れ', 'ro': 'ろ',
+    'wa': 'わ', 'wo': 'を',
+    'ga': 'が', 'gi': 'ぎ', 'gu': 'ぐ', 'ge': 'げ', 'go': 'ご',
+    'za': 'ざ', 'ji': 'じ', 'zi': 'じ', 'zu': 'ず', 'ze': 'ぜ', 'zo': 'ぞ',
+    'da': 'だ', 'di': 'ぢ', 'du': 'づ', 'de': 'で', 'do': 'ど',
+    'ba': 'ば', 'bi': 'び', 'bu': 'ぶ', 'be': 'べ', 'bo': 'ぼ',
+    'pa': 'ぱ', 'pi': 'ぴ', 'pu': 'ぷ', 'pe': 'ぺ', 'po': 'ぽ',
+    'kya': 'きゃ', 'kyu': 'きゅ', 'kyo': 'きょ',
+    'sha': 'しゃ', 'shu': 'しゅ', 'she': 'しぇ', 'sho': 'しょ', 'sya': 'しゃ', 'syu': 'しゅ', 'syo': 'しょ',
+    'cha': 'ちゃ', 'chu': 'ちゅ', 'che': 'ちぇ', 'cho': 'ちょ', 'tya': 'ちゃ', 'tyu': 'ちゅ', 'tyo': 'ちょ',
+    'nya': 'にゃ', 'nyu': 'にゅ', 'nyo': 'にょ',
+    'hya': 'ひゃ', 'hyu': 'ひゅ', 'hyo': 'ひょ',
+    'mya': 'みゃ', 'myu': 'みゅ', 'myo': 'みょ',
+    'rya': 'りゃ', 'ryu': 'りゅ', 'ryo': 'りょ',
+    'gya': 'ぎゃ', 'gyu': 'ぎゅ', 'gyo': 'ぎょ',
+    'ja': 'じゃ', 'ju': 'じゅ', 'je': 'じぇ', 'jo': 'じょ', 'jya': 'じゃ', 'jyu': 'じゅ', 'jyo': 'じょ',
+    'zya': 'じゃ', 'zyu': 'じゅ', 'zyo': 'じょ',
+    'bya': 'びゃ', 'byu': 'びゅ', 'byo': 'びょ',
+    'pya': 'ぴゃ', 'pyu': 'ぴゅ', 'pyo': 'ぴょ',
+    'fa': 'ふぁ', 'fi': 'ふぃ', 'fe': 'ふぇ', 'fo': 'ふぉ',
+    '-': 'ー',
+}
+ROMAJI_PREFIXES = {key[:length] for key in ROMAJI_TO_HIRAGANA for length in range(1, len(key))}
+VOWELS = set('aiueo')
+NOT_DOUBLED = VOWELS | set("n-'")
+
+
+def katakana_to_hiragana(value):
+    return ''.join(chr(ord(char) - 0x60) if 'ァ' <= char <= 'ヶ' else char for char in value)
+
+
+def romaji_to_hiragana(value):
+    """Convert romaji typed so far into hiragana.
+
+    An unfinished syllable at the end (e.g. the "k" of "ok") is dropped so the
+    result can be used as a search prefix. Returns None when the value is not
+    romaji at all.
+    """
+    if not ROMAJI_PATTERN.fullmatch(value):
+        return None
+
+    result = []
+    index = 0
+    while index < len(value):
+        rest = value[index:]
+        if rest[0] == 'n' and rest[1:2] == "'":
+            result.append('ん')
+            index += 2
+            continue
+        if rest[0] == 'n' and len(rest) > 1 and rest[1] not in VOWELS and rest[1] != 'y':
+            result.append('ん')
+            index += 1
+            continue
+        if rest.startswith('tch') or (len(rest) > 1 and rest[0] == rest[1] and rest[0] not in NOT_DOUBLED):
+            result.append('っ')
+            index += 1
+            continue
+        for length in (3, 2, 1):
+            kana = ROMAJI_TO_HIRAGANA.get(rest[:length])
+            if kana is not None:
+                result.append(kana)
+                index += length
+                break
+        else:
+            if rest in ROMAJI_PREFIXES:
+                break
+            return None
+    return ''.join(result)
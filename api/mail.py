@@ -0,0 +1,113 @@
+import base64
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxEmail
+
+
+def to_outbox(message):
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            raise TypeError('Only (filename, content, mimetype) attachments can be queued.')
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append([filename, base64.b64encode(content).decode('ascii'), mimetype])
+
+    return OutboxEmail(subject=message.subject, body=message.body, from_email=message.from_email, message={
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': message.extra_headers,
+        'content_subtype': message.content_subtype,
+        'alternatives': [list(alternative) for alternative in getattr(message, 'alternatives', [])],
+        'attachments': attachments,
+    })
+
+
+def from_outbox(email):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.message['to'],
+        cc=email.message['cc'],
+        bcc=email.message['bcc'],
+        reply_to=email.message['reply_to'],
+        headers=email.message['headers'],
+        alternatives=[tuple(alternative) for alternative in email.message['alternatives']],
+    )
+    message.content_subtype = email.message['content_subtype']
+    for filename, content, mimetype in email.message['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Queue messages in OutboxEmail for the send_outbox worker instead of talking to SMTP in the request.
+
+    The rows are written in the caller's transaction, so a rolled back request sends nothing.
+    """
+
+    def send_messages(self, email_messages):
+        try:
+            emails = [to_outbox(message) for message in email_messages if message.recipients()]
+            OutboxEmail.objects.bulk_create(emails)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(emails)
+
+
+def claim_outbox(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(OutboxEmail.objects
+                      .select_for_update(skip_locked=True)
+                      .filter(status='pending', next_attempt_at__lte=now)
+                      .order_by('next_attempt_at')[:batch_size])
+        # Push the claimed rows out of reach of other workers until this one is done or dead.
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS))
+    return emails
+
+
+def send_outbox(batch_size=None):
+    """Send one batch of due emails over a single connection. Returns (sent, failed) counts."""
+    emails = claim_outbox(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        for email in emails:
+            email.attempts += 1
+            try:
+                # A no-op while the connection is up, so one SMTP session serves the whole batch.
+                connection.open()
+                connection.send_messages([from_outbox(email)])
+            except Exception as e:
+                # Start the next message on a fresh connection in case this one broke.
+                connection.close()
+                failed += 1
+                email.last_error = repr(e)
+                if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    email.status = 'failed'
+                else:
+                    email.next_attempt_at = timezone.now() + timedelta(
+                        seconds=settings.OUTBOX_RETRY_SECONDS * 2 ** (email.attempts - 1))
+            else:
+                sent += 1
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+            email.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at'])
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,41 @@
+import time
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.core.signals import request_started, request_finished
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request database cost with and without persistent connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        original_max_age = connection.settings_dict['CONN_MAX_AGE']
+        results = {}
+        try:
+            for label, max_age in (('new connection per request', 0), ('persistent connection', None)):
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                results[label] = self.run(connection, options['requests'])
+        finally:
+            connection.settings_dict['CONN_MAX_AGE'] = original_max_age
+            connection.close()
+
+        for label, elapsed in results.items():
+            self.stdout.write('{:<28} {:8.3f} ms/request'.format(label, elapsed * 1000 / options['requests']))
+        saved = results['new connection per request'] - results['persistent connection']
+        self.stdout.write('saved {:.3f} ms/request'.format(saved * 1000 / options['requests']))
+
+    def run(self, connection, requests):
+        started = time.perf_counter()
+        for _ in range(requests):
+            request_started.send(sender=WSGIHandler)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            request_finished.send(sender=WSGIHandler)
+        return time.perf_counter() - started
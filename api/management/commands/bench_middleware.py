@@ -0,0 +1,63 @@
+import time
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import path
+
+
+def ping(request):
+    return HttpResponse('pong')
+
+
+# Requests are routed here instead of ROOT_URLCONF, so only the middleware is measured.
+urlpatterns = [
+    path('api/ping/', ping),
+    path('admin/ping/', ping),
+]
+
+UNSCOPED_MIDDLEWARE = {
+    'api.middleware.ScopedSessionMiddleware': 'django.contrib.sessions.middleware.SessionMiddleware',
+    'api.middleware.ScopedCsrfViewMiddleware': 'django.middleware.csrf.CsrfViewMiddleware',
+    'api.middleware.ScopedAuthenticationMiddleware': 'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ScopedMessageMiddleware': 'django.contrib.messages.middleware.MessageMiddleware',
+    'api.middleware.ScopedXFrameOptionsMiddleware': 'django.middleware.clickjacking.XFrameOptionsMiddleware',
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request middleware overhead with and without path-scoped session/CSRF middleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10000)
+        parser.add_argument('--path', default='/api/ping/', choices=['/api/ping/', '/admin/ping/'])
+
+    def handle(self, *args, **options):
+        scoped = list(settings.MIDDLEWARE)
+        chains = (
+            ('full chain', [UNSCOPED_MIDDLEWARE.get(middleware, middleware) for middleware in scoped]),
+            ('path-scoped chain', scoped),
+        )
+        results = {}
+        for label, middleware in chains:
+            with override_settings(MIDDLEWARE=middleware):
+                handler = BaseHandler()
+                handler.load_middleware()
+            results[label] = self.run(handler, options['path'], options['requests'])
+
+        for label, elapsed in results.items():
+            self.stdout.write('{:<18} {:8.1f} us/request'.format(label, elapsed * 1e6 / options['requests']))
+        saved = results['full chain'] - results['path-scoped chain']
+        self.stdout.write('saved {:.1f} us/request on {}'.format(saved * 1e6 / options['requests'], options['path']))
+
+    def run(self, handler, request_path, requests):
+        factory = RequestFactory()
+        started = time.perf_counter()
+        for _ in range(requests):
+            request = factory.get(request_path)
+            request.urlconf = __name__
+            response = handler.get_response(request)
+            if response.status_code != 200:
+                raise CommandError('{} answered {}'.format(request_path, response.status_code))
+        return time.perf_counter() - started
@@ -0,0 +1,96 @@
+import random
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from api.uuids import uuid7
+
+KEY_GENERATORS = {
+    'uuid4': uuid.uuid4,
+    'uuid7': uuid7,
+}
+
+KEY_STORAGES = {
+    'char': ('char(32)', lambda value: value.hex),
+    'binary': ('binary(16)', lambda value: value.bytes),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare insert throughput, table size and join speed of uuid4/uuid7 keys stored as char(32) or binary(16)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='use 10000000 for the production-sized run')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--keys', nargs='+', choices=KEY_GENERATORS, default=list(KEY_GENERATORS))
+        parser.add_argument('--storages', nargs='+', choices=KEY_STORAGES, default=list(KEY_STORAGES))
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        for key in options['keys']:
+            for storage in options['storages']:
+                self.bench(connection, key, storage, options['rows'], options['batch_size'])
+
+    def bench(self, connection, key, storage, rows, batch_size):
+        column_type, to_db = KEY_STORAGES[storage]
+        parent = 'bench_uuid_%s_%s' % (key, storage)
+        child = parent + '_child'
+        with connection.cursor() as cursor:
+            for table in (child, parent):
+                cursor.execute('DROP TABLE IF EXISTS %s' % table)
+            cursor.execute('CREATE TABLE %s (id %s NOT NULL PRIMARY KEY, payload varchar(64) NOT NULL)'
+                           % (parent, column_type))
+            cursor.execute('CREATE TABLE %s (id %s NOT NULL PRIMARY KEY, parent_id %s NOT NULL)'
+                           % (child, column_type, column_type))
+            cursor.execute('CREATE INDEX %s_parent_id ON %s (parent_id)' % (child, child))
+            try:
+                generate = KEY_GENERATORS[key]
+                parent_ids = []
+                started = time.perf_counter()
+                for offset in range(0, rows, batch_size):
+                    batch = [to_db(generate()) for _ in range(min(batch_size, rows - offset))]
+                    parent_ids.extend(batch)
+                    self.insert(connection, cursor, 'INSERT INTO %s (id, payload) VALUES (%%s, %%s)' % parent,
+                                [(pk, 'x' * 64) for pk in batch])
+                elapsed = time.perf_counter() - started
+
+                for offset in range(0, rows, batch_size):
+                    self.insert(connection, cursor, 'INSERT INTO %s (id, parent_id) VALUES (%%s, %%s)' % child,
+                                [(to_db(generate()), random.choice(parent_ids))
+                                 for _ in range(min(batch_size, rows - offset))])
+
+                started = time.perf_counter()
+                cursor.execute('SELECT COUNT(*) FROM %s p JOIN %s c ON c.parent_id = p.id' % (parent, child))
+                cursor.fetchone()
+                join_elapsed = time.perf_counter() - started
+
+                size = self.table_size(connection, cursor, parent)
+            finally:
+                for table in (child, parent):
+                    cursor.execute('DROP TABLE %s' % table)
+
+        self.stdout.write('{:<6} {:<7} {:>10.0f} rows/s  join {:>9.1f} ms  index+data {}'.format(
+            key, storage, rows / elapsed, join_elapsed * 1000,
+            '{:,} bytes'.format(size) if size is not None else 'n/a'))
+
+    def insert(self, connection, cursor, sql, params):
+        with transaction.atomic(using=connection.alias):
+            cursor.executemany(sql, params)
+
+    def table_size(self, connection, cursor, table):
+        if connection.vendor == 'mysql':
+            cursor.execute('ANALYZE TABLE %s' % table)
+            cursor.fetchall()
+            cursor.execute(
+                'SELECT data_length + index_length FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s', [table])
+            return cursor.fetchone()[0]
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name LIKE %s",
+                               [table, 'sqlite_autoindex_' + table + '_%'])
+            except Exception:
+                return None
+            return cursor.fetchone()[0]
+        return None
@@ -0,0 +1,50 @@
+import re
+import subprocess
+import sys
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+# What a gunicorn worker does before its first request: set up Django and load the URLconf.
+BOOT_SCRIPT = '''
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+'''
+
+
+class Command(BaseCommand):
+    help = 'Report cumulative import time per module for a cold worker boot (python -X importtime)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=30, help='number of modules to list')
+        parser.add_argument('--top-level', action='store_true', help='only list modules imported directly at boot')
+        parser.add_argument('--fail-above', type=float,
+                            help='exit with an error when the whole boot takes longer than this many ms')
+
+    def handle(self, *args, **options):
+        # A fresh interpreter, since everything is already imported in this one.
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+                                 stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, universal_newlines=True)
+        if process.returncode:
+            raise CommandError(process.stderr)
+
+        modules = []
+        for line in process.stderr.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, module = match.groups()
+                modules.append((int(cumulative_us), int(self_us), len(indent) // 2, module))
+
+        top_level = [module for module in modules if module[2] == 0]
+        total_ms = sum(cumulative_us for cumulative_us, _, _, _ in top_level) / 1000
+        listed = top_level if options['top_level'] else modules
+        self.stdout.write('{:>10} {:>10}  module'.format('cumul ms', 'self ms'))
+        for cumulative_us, self_us, depth, module in sorted(listed, reverse=True)[:options['limit']]:
+            self.stdout.write('{:>10.1f} {:>10.1f}  {}{}'.format(
+                cumulative_us / 1000, self_us / 1000, '  ' * depth, module))
+        self.stdout.write('total import time {:.1f} ms across {} modules'.format(total_ms, len(modules)))
+
+        if options['fail_above'] is not None and total_ms > options['fail_above']:
+            raise CommandError('import time {:.1f} ms is above {:.1f} ms'.format(total_ms, options['fail_above']))
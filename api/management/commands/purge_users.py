@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from api.purge import claim_purge, run_purge
+
+
+class Command(BaseCommand):
+    help = 'Delete the data of users who deleted their account, in small committed batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--loop', action='store_true', help='keep polling for new jobs')
+        parser.add_argument('--interval', type=float, default=5.0, help='seconds to wait between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_purge()
+            if job is None:
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            run_purge(job, options['batch_size'])
+            self.stdout.write('user {} {} after deleting {} rows (attempt {}){}'.format(
+                job.user_id, job.status, job.deleted_rows, job.attempts,
+                ': ' + job.last_error if job.status != 'done' else ''))
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models import Count
+from django.core.management.base import BaseCommand
+from api.models import Phrase, LanguagePairCount
+
+
+class Command(BaseCommand):
+    help = 'Recount phrases per language pair, e.g. after bulk_create or queryset.update()'
+
+    def handle(self, *args, **options):
+        pair_counts = (Phrase.objects
+                       .values('text_language', 'translated_word_language')
+                       .annotate(count=Count('id'))
+                       .order_by())
+        with transaction.atomic():
+            LanguagePairCount.objects.all().delete()
+            LanguagePairCount.objects.bulk_create(LanguagePairCount(**pair_count) for pair_count in pair_counts)
+        self.stdout.write('rebuilt {} language pairs'.format(LanguagePairCount.objects.count()))
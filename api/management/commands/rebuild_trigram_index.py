@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from api.models import Phrase
+from api.search import index_phrase
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the trigram index behind /api/phrases/similar/, e.g. after bulk_create'
+
+    def handle(self, *args, **options):
+        count = 0
+        for phrase in Phrase.objects.only('id', 'text').iterator(chunk_size=1000):
+            index_phrase(phrase)
+            count += 1
+        self.stdout.write('indexed {} phrases'.format(count))
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from api.mail import send_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued OutboxEmail messages in batches over reused SMTP connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--loop', action='store_true', help='keep polling for new messages')
+        parser.add_argument('--interval', type=float, default=5.0, help='seconds to wait between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_outbox(options['batch_size'])
+            if sent or failed:
+                self.stdout.write('sent {} emails, {} failed'.format(sent, failed))
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
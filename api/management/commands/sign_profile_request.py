@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from api.profiling import sign_profile_request
+
+
+class Command(BaseCommand):
+    help = 'Print a signed X-Profile-Request header value for profiling a single request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', default='profile')
+
+    def handle(self, *args, **options):
+        self.stdout.write(sign_profile_request(options['name']))
@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .compression import cached_compress, compress, compress_stream, is_compressible, negotiate_encoding
+from .health import readiness
+from .profiling import RequestProfile, is_valid_profile_signature
+
+PROFILE_REQUEST_HEADER = 'HTTP_X_PROFILE_REQUEST'
+PROFILE_MEMORY_HEADER = 'HTTP_X_PROFILE_MEMORY'
+
+
+class HealthCheckMiddleware:
+    """Answer load balancer probes before the rest of the middleware stack runs."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = request.path_info.rstrip('/')
+        if path == '/healthz':
+            return HttpResponse('ok', content_type='text/plain')
+        if path == '/readyz':
+            results = readiness()
+            ready = all(result == 'ok' for result in results.values())
+            return JsonResponse(results, status=200 if ready else 503)
+        return self.get_response(request)
+
+
+class RequestProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request.META.get(PROFILE_REQUEST_HEADER)
+        if not token or not self.can_profile(request, token):
+            return self.get_response(request)
+
+        with RequestProfile(trace_memory=request.META.get(PROFILE_MEMORY_HEADER) == '1') as profile:
+            response = self.get_response(request)
+        response['X-Profile-Id'] = profile.id
+        return response
+
+    def can_profile(self, request, token):
+        if token != '1':
+            return is_valid_profile_signature(token)
+
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return result is not None and result[0].is_staff
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            # Responses carrying an ETag are served again unchanged, so their compressed body is worth keeping.
+            body = cached_compress(response.content, encoding) if response.has_header('ETag') \
+                else compress(response.content, encoding)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class SessionPathMiddlewareMixin:
+    """Run a browser-oriented middleware only under SESSION_PATH_PREFIXES.
+
+    The API authenticates by JWT, so sessions, CSRF, messages and frame
+    options are dead weight on /api/ and /authen/. The subclasses keep their
+    base classes, so the admin's middleware checks still pass.
+    """
+
+    def in_scope(self, request):
+        return request.path_info.startswith(settings.SESSION_PATH_PREFIXES)
+
+    def __call__(self, request):
+        if not self.in_scope(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class ScopedSessionMiddleware(SessionPathMiddlewareMixin, SessionMiddleware):
+    pass
+
+
+class ScopedCsrfViewMiddleware(SessionPathMiddlewareMixin, CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if not self.in_scope(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class ScopedAuthenticationMiddleware(SessionPathMiddlewareMixin, AuthenticationMiddleware):
+    pass
+
+
+class ScopedMessageMiddleware(SessionPathMiddlewareMixin, MessageMiddleware):
+    pass
+
+
+class ScopedXFrameOptionsMiddleware(SessionPathMiddlewareMixin, XFrameOptionsMiddleware):
+    pass
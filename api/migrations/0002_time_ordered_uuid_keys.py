@@ -0,0 +1,34 @@
+# Generated by Django 3.1 on 2026-10-19 20:11
+
+import api.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='id',
+            field=models.UUIDField(default=api.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='phrase',
+            name='id',
+            field=models.UUIDField(default=api.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='id',
+            field=models.UUIDField(default=api.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=api.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
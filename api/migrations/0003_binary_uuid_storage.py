@@ -0,0 +1,92 @@
+import api.fields
+import api.uuids
+from django.db import migrations
+
+# Every column holding a User, Profile, Phrase or Comment id, including the
+# auth M2M tables and the admin log that point at the user model.
+UUID_COLUMNS = [
+    ('api_user', 'id'),
+    ('api_user_groups', 'user_id'),
+    ('api_user_user_permissions', 'user_id'),
+    ('api_profile', 'id'),
+    ('api_profile', 'user_id'),
+    ('api_phrase', 'id'),
+    ('api_phrase', 'user_id'),
+    ('api_comment', 'id'),
+    ('api_comment', 'user_id'),
+    ('api_comment', 'phrase_id'),
+    ('django_admin_log', 'user_id'),
+]
+
+
+def column_type(cursor, table, column):
+    cursor.execute(
+        'SELECT data_type FROM information_schema.columns '
+        'WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s',
+        [table, column],
+    )
+    row = cursor.fetchone()
+    return row[0].lower() if row else None
+
+
+def convert_columns(schema_editor, from_type, to_type, convert_sql):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SET FOREIGN_KEY_CHECKS = 0')
+        try:
+            for table, column in UUID_COLUMNS:
+                if column_type(cursor, table, column) != from_type:
+                    continue
+                # Go through varbinary so the hex text is kept byte for byte while it is rewritten.
+                cursor.execute('ALTER TABLE `%s` MODIFY `%s` varbinary(32) NOT NULL' % (table, column))
+                cursor.execute('UPDATE `%s` SET `%s` = %s' % (table, column, convert_sql % column))
+                cursor.execute('ALTER TABLE `%s` MODIFY `%s` %s NOT NULL' % (table, column, to_type))
+        finally:
+            cursor.execute('SET FOREIGN_KEY_CHECKS = 1')
+
+
+def hex_to_binary(apps, schema_editor):
+    convert_columns(schema_editor, 'char', 'binary(16)', 'UNHEX(`%s`)')
+
+
+def binary_to_hex(apps, schema_editor):
+    convert_columns(schema_editor, 'binary', 'char(32)', 'LOWER(HEX(`%s`))')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_time_ordered_uuid_keys'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(hex_to_binary, binary_to_hex),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='comment',
+                    name='id',
+                    field=api.fields.BinaryUUIDField(default=api.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='phrase',
+                    name='id',
+                    field=api.fields.BinaryUUIDField(default=api.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='profile',
+                    name='id',
+                    field=api.fields.BinaryUUIDField(default=api.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='id',
+                    field=api.fields.BinaryUUIDField(default=api.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.1 on 2026-10-19 20:15
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_language_pairs(apps, schema_editor):
+    Phrase = apps.get_model('api', 'Phrase')
+    LanguagePairCount = apps.get_model('api', 'LanguagePairCount')
+    pair_counts = (Phrase.objects
+                   .values('text_language', 'translated_word_language')
+                   .annotate(count=Count('id'))
+                   .order_by())
+    LanguagePairCount.objects.bulk_create(LanguagePairCount(**pair_count) for pair_count in pair_counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_binary_uuid_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LanguagePairCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_language', models.CharField(max_length=8)),
+                ('translated_word_language', models.CharField(max_length=8)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='phrase',
+            index=models.Index(fields=['text_language', 'translated_word_language'], name='api_phrase_text_la_36b48d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='languagepaircount',
+            constraint=models.UniqueConstraint(fields=('text_language', 'translated_word_language'), name='unique_language_pair'),
+        ),
+        migrations.RunPython(count_language_pairs, migrations.RunPython.noop),
+    ]
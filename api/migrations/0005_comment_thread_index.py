@@ -0,0 +1,17 @@
+# Generated by Django 3.1 on 2026-10-19 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_language_pair_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['phrase', 'created_at', 'id'], name='api_comment_phrase__9be1b3_idx'),
+        ),
+    ]
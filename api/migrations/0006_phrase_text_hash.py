@@ -0,0 +1,42 @@
+# Generated by Django 3.1 on 2026-10-19 20:25
+
+from django.db import migrations, models
+from api.text import text_hash
+
+
+def fill_text_hash(apps, schema_editor):
+    Phrase = apps.get_model('api', 'Phrase')
+    phrases = Phrase.objects.only('id', 'text').order_by('pk')
+    batch = []
+    for phrase in phrases.iterator(chunk_size=1000):
+        phrase.text_hash = text_hash(phrase.text)
+        batch.append(phrase)
+        if len(batch) == 1000:
+            Phrase.objects.bulk_update(batch, ['text_hash'])
+            batch = []
+    Phrase.objects.bulk_update(batch, ['text_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='phrase',
+            name='text_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_text_hash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='phrase',
+            index=models.Index(fields=['user', 'text_hash'], name='api_phrase_user_id_376b7c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='phrase',
+            index=models.Index(fields=['text_hash'], name='api_phrase_text_ha_f4b3a8_idx'),
+        ),
+    ]
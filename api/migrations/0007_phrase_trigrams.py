@@ -0,0 +1,36 @@
+# Generated by Django 3.1 on 2026-10-19 20:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+from api.text import trigrams
+
+
+def index_phrases(apps, schema_editor):
+    Phrase = apps.get_model('api', 'Phrase')
+    PhraseTrigram = apps.get_model('api', 'PhraseTrigram')
+    for phrase in Phrase.objects.only('id', 'text').iterator(chunk_size=1000):
+        PhraseTrigram.objects.bulk_create((PhraseTrigram(trigram=gram, phrase_id=phrase.pk) for gram in trigrams(phrase.text)),
+                                          ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_phrase_text_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhraseTrigram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('phrase', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='api.phrase')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='phrasetrigram',
+            constraint=models.UniqueConstraint(fields=('trigram', 'phrase'), name='unique_phrase_trigram'),
+        ),
+        migrations.RunPython(index_phrases, migrations.RunPython.noop),
+    ]
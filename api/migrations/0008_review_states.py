@@ -0,0 +1,38 @@
+# Generated by Django 3.1 on 2026-10-19 20:25
+
+import api.fields
+import api.uuids
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_phrase_trigrams'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewState',
+            fields=[
+                ('id', api.fields.BinaryUUIDField(default=api.uuids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('due_at', models.DateTimeField()),
+                ('interval', models.PositiveIntegerField(default=0)),
+                ('ease', models.FloatField(default=2.5)),
+                ('repetitions', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('phrase', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_states', to='api.phrase')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='reviewstate',
+            index=models.Index(fields=['user', 'due_at'], name='api_reviews_user_id_becac8_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='reviewstate',
+            constraint=models.UniqueConstraint(fields=('user', 'phrase'), name='unique_review_state'),
+        ),
+    ]
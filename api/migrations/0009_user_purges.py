@@ -0,0 +1,34 @@
+# Generated by Django 3.1 on 2026-10-19 20:30
+
+import api.fields
+import api.uuids
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_review_states'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPurge',
+            fields=[
+                ('id', api.fields.BinaryUUIDField(default=api.uuids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('user_id', api.fields.BinaryUUIDField(unique=True)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=7)),
+                ('deleted_rows', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='userpurge',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='api_userpur_status_63cedd_idx'),
+        ),
+    ]
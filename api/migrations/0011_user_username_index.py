@@ -0,0 +1,17 @@
+# Generated by Django 3.1 on 2026-10-19 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_outbox_emails'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['username'], name='api_user_usernam_edfd3a_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.utils.cache import patch_cache_control
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from friends_phrase.db.routers import replica_reads, pin_to_primary, is_pinned_to_primary
+from .caching import etag_matches, get_cached_representation
+from .idempotency import IDEMPOTENCY_KEY_HEADER, idempotent_response
+
+
+class ReplicaReadMixin:
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS and not is_pinned_to_primary(request.user):
+            self._replica_reads = replica_reads()
+            self._replica_reads.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica_reads_context = getattr(self, '_replica_reads', None)
+        if replica_reads_context is not None:
+            replica_reads_context.__exit__(None, None, None)
+            self._replica_reads = None
+        elif request.method not in permissions.SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class CachedRetrieveMixin:
+    def get_cache_key(self):
+        # The key must be scoped to whatever the representation depends on and be deleted when it
+        # changes, so every view has to choose its own.
+        raise NotImplementedError('%s must implement get_cache_key()' % type(self).__name__)
+
+    def get_cached_object(self):
+        return self.get_object()
+
+    def cached_retrieve(self, request):
+        data, etag = get_cached_representation(self.get_cache_key(),
+                                               lambda: self.get_serializer(self.get_cached_object()).data)
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class IdempotentCreateMixin:
+    def create(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_KEY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return super().create(request, *args, **kwargs)
+        create = super().create
+        return idempotent_response(request, key, lambda: create(request, *args, **kwargs))
@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.conf import settings
-import uuid
+from django.utils import timezone
+from .fields import BinaryUUIDField
+from .text import text_hash
+from .uuids import uuid7
 
 language_max_length = 3
 
@@ -25,7 +28,7 @@ class UserManager(BaseUserManager):
 
 
 class User(AbstractBaseUser, PermissionsMixin):
-    id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
+    id = BinaryUUIDField(default=uuid7, primary_key=True, editable=False)
     username = models.CharField(max_length=20)
     email = models.EmailField(max_length=100, unique=True)
     icon = models.ImageField(upload_to='icons', verbose_name='アイコン', default='icons/default.png')
@@ -38,10 +41,42 @@ class User(AbstractBaseUser, PermissionsMixin):
     EMAIL_FIELD = "username"
     REQUIRED_FIELDS = ['username']
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['username']),
+        ]
+
     def __str__(self):
         return self.username
 
 
+class UserPurge(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'pending'),
+        ('running', 'running'),
+        ('done', 'done'),
+        ('failed', 'failed'),
+    )
+    id = BinaryUUIDField(default=uuid7, primary_key=True, editable=False)
+    # Not a foreign key: the job has to outlive the user it deletes.
+    user_id = BinaryUUIDField(unique=True)
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default='pending')
+    deleted_rows = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return '{} {}'.format(self.user_id, self.status)
+
+
 class Profile(models.Model):
     SEX_CHOICES = (
         ('men', 'men'),
@@ -51,7 +86,7 @@ class Profile(models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
-    id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
+    id = BinaryUUIDField(default=uuid7, primary_key=True, editable=False)
     sex = models.CharField(max_length=7, choices=SEX_CHOICES)
     date_of_birth = models.CharField(max_length=10)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -76,15 +111,19 @@ class PhraseManager(models.Manager):
         if not user:
             raise ValueError('user is must')
 
-        phrase = self.create(text=text, text_language=text_language, translated_word=translated_word,
-                             translated_word_language=translated_word_language,
-                             user=user)
-        phrase.save()
-        return phrase
+        return self.create(text=text, text_language=text_language, translated_word=translated_word,
+                           translated_word_language=translated_word_language,
+                           user=user)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.text_hash = text_hash(obj.text)
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 class Phrase(models.Model):
-    id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
+    id = BinaryUUIDField(default=uuid7, primary_key=True, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
@@ -97,14 +136,98 @@ class Phrase(models.Model):
         max_length=1000,
     )
     translated_word_language = models.CharField(max_length=8)
+    # text is too long to index on MySQL, so exact matches go through this hash of the normalized text.
+    text_hash = models.CharField(max_length=64, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     objects = PhraseManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['text_language', 'translated_word_language']),
+            models.Index(fields=['user', 'text_hash']),
+            models.Index(fields=['text_hash']),
+        ]
+
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        self.text_hash = text_hash(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_hash'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'text_language' in instance.__dict__ and 'translated_word_language' in instance.__dict__:
+            instance._loaded_language_pair = instance.language_pair
+        if 'text_hash' in instance.__dict__:
+            instance._loaded_text_hash = instance.text_hash
+        if 'text' in instance.__dict__:
+            instance._loaded_text = instance.text
+        return instance
+
+    @property
+    def language_pair(self):
+        return self.text_language, self.translated_word_language
+
+
+class PhraseTrigram(models.Model):
+    trigram = models.CharField(max_length=3)
+    phrase = models.ForeignKey(Phrase, on_delete=models.CASCADE, related_name='trigrams')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['trigram', 'phrase'], name='unique_phrase_trigram'),
+        ]
+
+    def __str__(self):
+        return self.trigram
+
+
+class LanguagePairCount(models.Model):
+    text_language = models.CharField(max_length=8)
+    translated_word_language = models.CharField(max_length=8)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['text_language', 'translated_word_language'], name='unique_language_pair'),
+        ]
+
+    def __str__(self):
+        return '{} -> {}'.format(self.text_language, self.translated_word_language)
+
+
+class ReviewState(models.Model):
+    id = BinaryUUIDField(default=uuid7, primary_key=True, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    phrase = models.ForeignKey(Phrase, on_delete=models.CASCADE, related_name='review_states')
+    due_at = models.DateTimeField()
+    # Days until the next review, as scheduled by SM-2.
+    interval = models.PositiveIntegerField(default=0)
+    ease = models.FloatField(default=2.5)
+    repetitions = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'phrase'], name='unique_review_state'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'due_at']),
+        ]
+
+    def __str__(self):
+        return '{} {}'.format(self.user, self.phrase)
+
 
 class CommentManager(models.Manager):
     def create_comment(self, text, text_language, user, phrase):
@@ -117,13 +240,11 @@ class CommentManager(models.Manager):
         if not user:
             raise ValueError('user is must')
 
-        comment = self.create(text=text, text_language=text_language, user=user, phrase=phrase)
-        comment.save()
-        return comment
+        return self.create(text=text, text_language=text_language, user=user, phrase=phrase)
 
 
 class Comment(models.Model):
-    id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
+    id = BinaryUUIDField(default=uuid7, primary_key=True, editable=False)
     text = models.CharField(max_length=1000)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -136,5 +257,38 @@ class Comment(models.Model):
 
     objects = CommentManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['phrase', 'created_at', 'id']),
+        ]
+
     def __str__(self):
         return self.text
+
+
+class OutboxEmail(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'pending'),
+        ('sent', 'sent'),
+        ('failed', 'failed'),
+    )
+    id = BinaryUUIDField(default=uuid7, primary_key=True, editable=False)
+    subject = models.TextField()
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    # Recipients, headers, alternatives and attachments of the original EmailMessage.
+    message = models.JSONField(default=dict)
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return self.subject
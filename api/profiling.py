@@ -0,0 +1,73 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import tracemalloc
+import uuid
+from django.conf import settings
+from django.core import signing
+
+PROFILE_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+PROFILE_SIGNING_SALT = 'api.request_profile'
+PROFILE_KINDS = {
+    'prof': '.prof',
+    'stats': '.txt',
+    'memory': '.mem.txt',
+}
+
+
+def sign_profile_request(name='profile'):
+    return signing.dumps(name, salt=PROFILE_SIGNING_SALT)
+
+
+def is_valid_profile_signature(value):
+    try:
+        signing.loads(value, salt=PROFILE_SIGNING_SALT, max_age=settings.REQUEST_PROFILING_SIGNATURE_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def profile_path(profile_id, kind='prof'):
+    if not PROFILE_ID_PATTERN.fullmatch(profile_id) or kind not in PROFILE_KINDS:
+        return None
+    return os.path.join(settings.REQUEST_PROFILING_ROOT, profile_id + PROFILE_KINDS[kind])
+
+
+class RequestProfile:
+    def __init__(self, trace_memory=False):
+        self.id = uuid.uuid4().hex
+        self.trace_memory = trace_memory
+        self.profiler = cProfile.Profile()
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.disable()
+        snapshot = tracemalloc.take_snapshot() if self.trace_memory else None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        self.save(snapshot)
+        return False
+
+    def save(self, snapshot=None):
+        os.makedirs(settings.REQUEST_PROFILING_ROOT, exist_ok=True)
+        self.profiler.dump_stats(profile_path(self.id, 'prof'))
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(settings.REQUEST_PROFILING_STATS_LIMIT)
+        with open(profile_path(self.id, 'stats'), 'w') as f:
+            f.write(stream.getvalue())
+
+        if snapshot is not None:
+            top_stats = snapshot.statistics('lineno')[:settings.REQUEST_PROFILING_STATS_LIMIT]
+            with open(profile_path(self.id, 'memory'), 'w') as f:
+                f.write('\n'.join(str(stat) for stat in top_stats))
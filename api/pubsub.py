@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import threading
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """A channel's messages for one connection, buffered on the event loop it was opened on."""
+
+    def __init__(self, backend, channel, maxsize):
+        self.backend = backend
+        self.channel = channel
+        self.loop = asyncio.get_event_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, message):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client this far behind is cut off; it reconnects and refetches instead of getting a gap.
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        """Return the next message, or None once the subscriber has fallen too far behind."""
+        return await self.queue.get()
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class LocalBackend:
+    """Fan out to the subscribers of this process.
+
+    Writes made by other processes are not seen, so deployments with more than
+    one worker point PUBSUB_BACKEND at a backend shared between them.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, settings.PUBSUB_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscribers.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscribers.pop(subscription.channel, None)
+
+    def has_subscribers(self, channel):
+        return channel in self.subscribers
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscribers.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # The loop has shut down; its subscriptions go with it.
+                self.unsubscribe(subscription)
+
+
+_backend = None
+_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                backend = import_string(settings.PUBSUB_BACKEND)()
+                if not getattr(backend, 'shared', True) and settings.WEB_CONCURRENCY > 1:
+                    logger.warning('%s only delivers within one process, but %d processes serve the app: '
+                                   'streams will miss writes made by the others. Set PUBSUB_BACKEND to a '
+                                   'backend shared between processes, or run a single worker.',
+                                   settings.PUBSUB_BACKEND, settings.WEB_CONCURRENCY)
+                _backend = backend
+    return _backend
+
+
+def subscribe(channel):
+    return get_backend().subscribe(channel)
+
+
+def publish(channels, get_message):
+    """Publish the message returned by get_message, which is only called if a channel has subscribers."""
+    backend = get_backend()
+    channels = [channel for channel in channels if backend.has_subscribers(channel)]
+    if not channels:
+        return
+    message = get_message()
+    if message is None:
+        return
+    for channel in channels:
+        backend.publish(channel, message)
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from . import feed
+from .models import User, Profile, Phrase, PhraseTrigram, Comment, ReviewState, UserPurge
+
+
+def schedule_user_purge(user):
+    """Deactivate the user now and leave deleting their data to the purge worker."""
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        job, _ = UserPurge.objects.get_or_create(user_id=user.pk)
+        transaction.on_commit(lambda: feed.remove_user(user.pk))
+    return job
+
+
+def purge_steps(user_id):
+    # Children before parents, so the cascade collector never has much left to load. Each step filters a
+    # single indexed column, so every batch is an index range read rather than a scan from the start.
+    phrase_ids = Phrase.objects.filter(user_id=user_id).values('pk')
+    return [
+        Comment.objects.filter(user_id=user_id),
+        Comment.objects.filter(phrase_id__in=phrase_ids),
+        PhraseTrigram.objects.filter(phrase_id__in=phrase_ids),
+        ReviewState.objects.filter(user_id=user_id),
+        ReviewState.objects.filter(phrase_id__in=phrase_ids),
+        Phrase.objects.filter(user_id=user_id),
+        Profile.objects.filter(user_id=user_id),
+        User.objects.filter(pk=user_id),
+    ]
+
+
+def purge_user(job, batch_size=None):
+    batch_size = batch_size or settings.USER_PURGE_BATCH_SIZE
+    for queryset in purge_steps(job.user_id):
+        while True:
+            with transaction.atomic():
+                # No ORDER BY: any batch will do, and sorting by pk would pull the plan off the filter's index.
+                ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                # Deleting through the model keeps the post_delete receivers (counts, feed, indexes) in step.
+                deleted, _ = queryset.model.objects.filter(pk__in=ids).delete()
+                job.deleted_rows += deleted
+                job.next_attempt_at = timezone.now() + timedelta(seconds=settings.USER_PURGE_LEASE_SECONDS)
+                job.save(update_fields=['deleted_rows', 'next_attempt_at', 'updated_at'])
+    job.status = 'done'
+    job.save(update_fields=['status', 'updated_at'])
+
+
+def claim_purge():
+    """Take the next due job. A running job whose lease ran out is taken over from a dead worker."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (UserPurge.objects
+               .select_for_update(skip_locked=True)
+               .filter(status__in=('pending', 'running'), next_attempt_at__lte=now)
+               .order_by('next_attempt_at')
+               .first())
+        if job is None:
+            return None
+        job.status = 'running'
+        job.attempts += 1
+        job.next_attempt_at = now + timedelta(seconds=settings.USER_PURGE_LEASE_SECONDS)
+        job.save(update_fields=['status', 'attempts', 'next_attempt_at', 'updated_at'])
+    return job
+
+
+def run_purge(job, batch_size=None):
+    try:
+        purge_user(job, batch_size)
+    except Exception as e:
+        # The failed batch was rolled back, so only committed progress counts.
+        job.refresh_from_db(fields=['deleted_rows'])
+        job.last_error = repr(e)
+        if job.attempts >= settings.USER_PURGE_MAX_ATTEMPTS:
+            job.status = 'failed'
+        else:
+            job.status = 'pending'
+            job.next_attempt_at = timezone.now() + timedelta(
+                seconds=settings.USER_PURGE_RETRY_SECONDS * 2 ** (job.attempts - 1))
+        job.save(update_fields=['status', 'last_error', 'next_attempt_at', 'updated_at'])
+    return job
@@ -0,0 +1,38 @@
+from collections import Counter
+from django.conf import settings
+from .models import Phrase, PhraseTrigram
+from .text import normalize_text, trigrams, similarity
+
+
+def index_phrase(phrase):
+    PhraseTrigram.objects.filter(phrase_id=phrase.pk).delete()
+    # Case/accent-insensitive MySQL collations can fold two trigrams into one key.
+    PhraseTrigram.objects.bulk_create(
+        (PhraseTrigram(trigram=gram, phrase_id=phrase.pk) for gram in trigrams(phrase.text)),
+        ignore_conflicts=True)
+
+
+def similar_phrases(query, limit=10, exclude_user=None):
+    if not normalize_text(query):
+        return []
+    grams = sorted(trigrams(query))[:settings.SIMILAR_PHRASE_MAX_QUERY_TRIGRAMS]
+
+    # Each posting list is read through the (trigram, phrase) index and capped,
+    # so the work is bounded by the number of query trigrams, not the table size.
+    hits = Counter()
+    for gram in grams:
+        postings = (PhraseTrigram.objects
+                    .filter(trigram=gram)
+                    .order_by('-phrase_id')
+                    .values_list('phrase_id', flat=True)[:settings.SIMILAR_PHRASE_POSTINGS_LIMIT])
+        hits.update(postings)
+
+    candidate_ids = [phrase_id for phrase_id, _ in hits.most_common(limit * settings.SIMILAR_PHRASE_CANDIDATE_FACTOR)]
+    candidates = Phrase.objects.filter(id__in=candidate_ids).select_related('user').prefetch_related('comments')
+    if exclude_user is not None:
+        candidates = candidates.exclude(user=exclude_user)
+
+    query_grams = set(grams)
+    scored = [(similarity(query_grams, trigrams(phrase.text)), phrase) for phrase in candidates]
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored[:limit]
@@ -1,6 +1,9 @@
 from rest_framework import serializers
-from .models import Profile, Phrase, Comment
+from .models import Profile, Phrase, Comment, LanguagePairCount, ReviewState
+from .text import text_hash
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
 
 class LoginUserSerializer(serializers.ModelSerializer):
@@ -36,7 +39,22 @@ class PostUserSerializer(serializers.ModelSerializer):
     }
 
 
-class PhraseSerializer(serializers.ModelSerializer):
+class ChangedFieldsUpdateMixin:
+    def update(self, instance, validated_data):
+        changed = []
+        for name, value in validated_data.items():
+            field = instance._meta.get_field(name)
+            current = getattr(instance, field.attname)
+            if (value.pk if field.is_relation else value) != current:
+                setattr(instance, name, value)
+                changed.append(name)
+        # A save would rewrite every column, so only the changed ones (and updated_at) are written.
+        if changed:
+            instance.save(update_fields=[*changed, 'updated_at'])
+        return instance
+
+
+class PhraseSerializer(ChangedFieldsUpdateMixin, serializers.ModelSerializer):
     LANGUAGE_CHOICES = (
         ('en', 'English'),
         ('jp', 'Japanese'),
@@ -66,6 +84,34 @@ class PhraseSerializer(serializers.ModelSerializer):
             'comments': {'read_only': True}
         }
 
+    DUPLICATE_TEXT_MESSAGE = 'You have already saved this phrase.'
+
+    def get_phrase_user(self):
+        return self.instance.user if self.instance else self.context['request'].user
+
+    def has_duplicate(self, user, value):
+        duplicates = Phrase.objects.filter(user=user, text_hash=text_hash(value))
+        if self.instance:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        return duplicates.exists()
+
+    def validate_text(self, value):
+        if settings.PHRASE_REJECT_DUPLICATES and self.has_duplicate(self.get_phrase_user(), value):
+            raise serializers.ValidationError(self.DUPLICATE_TEXT_MESSAGE)
+        return value
+
+    def save(self, **kwargs):
+        if not settings.PHRASE_REJECT_DUPLICATES or 'text' not in self.validated_data:
+            return super().save(**kwargs)
+
+        # The phrase table has no unique key to enforce this (it is optional and old rows may repeat),
+        # so a user's saves queue up on their user row and repeat the check once they hold it.
+        with transaction.atomic():
+            user = get_user_model().objects.select_for_update().get(pk=self.get_phrase_user().pk)
+            if self.has_duplicate(user, self.validated_data['text']):
+                raise serializers.ValidationError({'text': [self.DUPLICATE_TEXT_MESSAGE]})
+            return super().save(**kwargs)
+
 
 class UserSerializer(serializers.ModelSerializer):
     phrases = PhraseSerializer(many=True, read_only=True)
@@ -83,7 +129,7 @@ class UserSerializer(serializers.ModelSerializer):
         return get_user_model().objects.create_user(**validated_data)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(ChangedFieldsUpdateMixin, serializers.ModelSerializer):
     LANGUAGE_CHOICES = (
         ('en', 'English'),
         ('jp', 'Japanese'),
@@ -102,3 +148,65 @@ class CommentSerializer(serializers.ModelSerializer):
             'text': {'required': True},
             'text_language': {'required': True},
         }
+
+
+class LanguagePairCountSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LanguagePairCount
+        fields = ['text_language', 'translated_word_language', 'count']
+
+
+class StudyCardSerializer(serializers.ModelSerializer):
+    due_at = serializers.DateTimeField(source='review_state.due_at', read_only=True, default=None)
+    repetitions = serializers.IntegerField(source='review_state.repetitions', read_only=True, default=0)
+
+    class Meta:
+        model = Phrase
+        fields = ['id', 'text', 'text_language', 'translated_word', 'translated_word_language', 'due_at', 'repetitions']
+
+
+class ReviewResultSerializer(serializers.Serializer):
+    phrase = serializers.UUIDField()
+    quality = serializers.IntegerField(min_value=0, max_value=5)
+
+
+class ReviewResultsSerializer(serializers.Serializer):
+    results = ReviewResultSerializer(many=True, allow_empty=False)
+
+    def validate_results(self, value):
+        if len(value) > settings.STUDY_DECK_MAX_SIZE:
+            raise serializers.ValidationError(
+                'Ensure this field has no more than {} elements.'.format(settings.STUDY_DECK_MAX_SIZE))
+        phrase_ids = {result['phrase'] for result in value}
+        owned = set(Phrase.objects.filter(user=self.context['request'].user, id__in=phrase_ids)
+                    .values_list('id', flat=True))
+        if owned != phrase_ids:
+            raise serializers.ValidationError('Unknown phrase.')
+        return value
+
+
+class ReviewStateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReviewState
+        fields = ['phrase', 'due_at', 'interval', 'ease', 'repetitions']
+
+
+class SubRequestSerializer(serializers.Serializer):
+    METHOD_CHOICES = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+    method = serializers.ChoiceField(choices=METHOD_CHOICES, default='GET')
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False, allow_null=True)
+    # Sent as the sub-request's If-None-Match and Idempotency-Key headers.
+    if_none_match = serializers.CharField(required=False)
+    idempotency_key = serializers.CharField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                'Ensure this field has no more than {} elements.'.format(settings.BATCH_MAX_REQUESTS))
+        return value
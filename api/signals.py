@@ -0,0 +1,137 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from . import autocomplete, caching, feed, search, stream
+from .models import User, Profile, Phrase, Comment, LanguagePairCount
+
+
+def add_language_pair_count(language_pair, delta):
+    text_language, translated_word_language = language_pair
+    pair_counts = LanguagePairCount.objects.filter(text_language=text_language,
+                                                   translated_word_language=translated_word_language)
+    if delta < 0:
+        # GREATEST(count, n) - n stops at zero without going through a negative value, which an
+        # unsigned column would reject, so a count that has drifted low cannot fail the write.
+        new_count = Greatest(F('count'), -delta) + delta
+    else:
+        new_count = F('count') + delta
+    if pair_counts.update(count=new_count) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            LanguagePairCount.objects.create(text_language=text_language,
+                                             translated_word_language=translated_word_language,
+                                             count=delta)
+    except IntegrityError:
+        pair_counts.update(count=F('count') + delta)
+
+
+@receiver(post_save, sender=Phrase)
+def update_language_pair_count_on_save(sender, instance, created, **kwargs):
+    language_pair = instance.language_pair
+    if created:
+        add_language_pair_count(language_pair, 1)
+    else:
+        loaded_language_pair = getattr(instance, '_loaded_language_pair', language_pair)
+        if loaded_language_pair != language_pair:
+            add_language_pair_count(loaded_language_pair, -1)
+            add_language_pair_count(language_pair, 1)
+    instance._loaded_language_pair = language_pair
+
+
+@receiver(post_delete, sender=Phrase)
+def update_language_pair_count_on_delete(sender, instance, **kwargs):
+    add_language_pair_count(getattr(instance, '_loaded_language_pair', instance.language_pair), -1)
+
+
+@receiver(post_save, sender=Phrase)
+def update_feed_on_phrase_save(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: feed.push_phrase(instance.id))
+    else:
+        transaction.on_commit(lambda: feed.refresh_phrase(instance.id))
+
+
+@receiver(post_delete, sender=Phrase)
+def update_feed_on_phrase_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: feed.remove_phrase(instance.id))
+
+
+@receiver(post_save, sender=Phrase)
+def publish_phrase_save(sender, instance, created, **kwargs):
+    event = 'phrase.created' if created else 'phrase.updated'
+    transaction.on_commit(lambda: stream.publish_phrase(instance.id, event))
+
+
+@receiver(post_delete, sender=Phrase)
+def publish_phrase_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: stream.publish_phrase(instance.id, 'phrase.deleted'))
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment_save(sender, instance, created, **kwargs):
+    event = 'comment.created' if created else 'comment.updated'
+    transaction.on_commit(lambda: stream.publish_comment(instance.id, instance.phrase_id, event))
+
+
+@receiver(post_delete, sender=Comment)
+def publish_comment_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: stream.publish_comment(instance.id, instance.phrase_id, 'comment.deleted'))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def update_feed_on_comment_change(sender, instance, **kwargs):
+    transaction.on_commit(lambda: feed.refresh_phrase(instance.phrase_id))
+
+
+@receiver(post_save, sender=User)
+def update_feed_on_user_save(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and not {'username', 'icon'} & set(update_fields)):
+        return
+    transaction.on_commit(lambda: feed.remove_user(instance.id))
+
+
+@receiver(post_save, sender=User)
+def invalidate_me_on_user_save(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and not {'username', 'icon', 'is_active'} & set(update_fields)):
+        return
+    transaction.on_commit(lambda: caching.invalidate_login_user(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_me_on_user_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: caching.invalidate_login_user(instance.pk))
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_me_on_profile_change(sender, instance, **kwargs):
+    transaction.on_commit(lambda: caching.invalidate_profile(instance.user_id))
+
+
+@receiver(post_save, sender=Phrase)
+def update_text_indexes_on_save(sender, instance, created, **kwargs):
+    if created:
+        search.index_phrase(instance)
+        text = instance.text
+        transaction.on_commit(lambda: autocomplete.add_phrase(text))
+    elif getattr(instance, '_loaded_text_hash', None) != instance.text_hash:
+        search.index_phrase(instance)
+        loaded_text, text = getattr(instance, '_loaded_text', None), instance.text
+
+        def update_autocomplete():
+            autocomplete.remove_phrase(loaded_text)
+            autocomplete.add_phrase(text)
+        # Without the old text (e.g. it was deferred) there is nothing to take out, so rebuild instead.
+        transaction.on_commit(update_autocomplete if loaded_text is not None else autocomplete.invalidate)
+    instance._loaded_text_hash = instance.text_hash
+    instance._loaded_text = instance.text
+
+
+@receiver(post_delete, sender=Phrase)
+def update_text_indexes_on_delete(sender, instance, **kwargs):
+    text = instance.text
+    transaction.on_commit(lambda: autocomplete.remove_phrase(text))
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import re
+import secrets
+import time
+import uuid
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from djangorestframework_camel_case.util import camelize
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed, TokenError
+from . import feed, pubsub
+from .models import Phrase, Comment
+from .serializers import CommentSerializer
+
+STREAM_PATH_PREFIX = '/api/stream/'
+FEED_CHANNEL = 'feed'
+FEED_PATH = re.compile(r'^/api/stream/feed/$')
+THREAD_PATH = re.compile(r'^/api/stream/phrases/(?P<phrase_id>[0-9a-f-]{32,36})/comments/$')
+DISCONNECT_TYPES = ('http.disconnect', 'websocket.disconnect')
+WEBSOCKET_TOKEN_PROTOCOL = 'jwt'
+
+
+def thread_channel(phrase_id):
+    return 'phrase:{}'.format(phrase_id)
+
+
+def encode_event(event, data):
+    return json.dumps(camelize({'event': event, 'data': data}), cls=JSONEncoder)
+
+
+def publish_phrase(phrase_id, event):
+    if event == 'phrase.deleted':
+        pubsub.publish([FEED_CHANNEL, thread_channel(phrase_id)],
+                       lambda: encode_event(event, {'id': str(phrase_id)}))
+        return
+
+    def get_message():
+        data = feed.serialize_phrase(phrase_id)
+        return encode_event(event, data) if data is not None else None
+
+    pubsub.publish([FEED_CHANNEL], get_message)
+
+
+def publish_comment(comment_id, phrase_id, event):
+    if event == 'comment.deleted':
+        pubsub.publish([thread_channel(phrase_id)],
+                       lambda: encode_event(event, {'id': str(comment_id), 'phrase': str(phrase_id)}))
+        return
+
+    def get_message():
+        comment = Comment.objects.select_related('user').filter(id=comment_id).first()
+        return encode_event(event, CommentSerializer(comment).data) if comment is not None else None
+
+    pubsub.publish([thread_channel(phrase_id)], get_message)
+
+
+def resolve_channel(path):
+    if FEED_PATH.match(path):
+        return FEED_CHANNEL, None
+    match = THREAD_PATH.match(path)
+    if match:
+        try:
+            phrase_id = uuid.UUID(match.group('phrase_id'))
+        except ValueError:
+            return None, None
+        return thread_channel(phrase_id), phrase_id
+    return None, None
+
+
+def stream_ticket_cache_key(ticket):
+    return 'stream-ticket:{}'.format(ticket)
+
+
+def issue_stream_ticket(token):
+    """Return a single-use ticket for opening one Server-Sent Events stream, valid until the token expires."""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(stream_ticket_cache_key(ticket), token['exp'], settings.STREAM_TICKET_SECONDS)
+    return ticket
+
+
+def redeem_stream_ticket(ticket):
+    key = stream_ticket_cache_key(ticket)
+    expires_at = cache.get(key)
+    # Only the request that manages to delete the ticket gets to use it.
+    if expires_at is None or not cache.delete(key):
+        return None
+    return expires_at
+
+
+def validate_token(raw_token):
+    authentication = JWTAuthentication()
+    try:
+        token = authentication.get_validated_token(raw_token)
+        authentication.get_user(token)
+    except (InvalidToken, AuthenticationFailed, TokenError):
+        return None
+    return token['exp']
+
+
+def websocket_token(scope):
+    # Browsers cannot set headers on a WebSocket, so the JWT follows 'jwt' in its subprotocols.
+    protocols = scope.get('subprotocols') or []
+    if WEBSOCKET_TOKEN_PROTOCOL not in protocols[:-1]:
+        return ''
+    return protocols[protocols.index(WEBSOCKET_TOKEN_PROTOCOL) + 1]
+
+
+def open_stream(authenticate, credential, phrase_id):
+    """Return (status, expires_at) for a stream request; expires_at is None unless status is 200."""
+    close_old_connections()
+    try:
+        expires_at = authenticate(credential)
+        if expires_at is None:
+            return 401, None
+        if phrase_id is not None and not Phrase.objects.filter(id=phrase_id).exists():
+            return 404, None
+        return 200, expires_at
+    finally:
+        close_old_connections()
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] not in DISCONNECT_TYPES:
+        pass
+
+
+async def pump(subscription, receive, send_message, send_keepalive, expires_at):
+    """Forward messages until the client leaves, falls behind, or its token expires; True if it left."""
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        while True:
+            timeout = min(settings.STREAM_KEEPALIVE_SECONDS, expires_at - time.time())
+            if timeout <= 0:
+                return False
+            get = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait({get, disconnect}, timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                get.cancel()
+                return True
+            if get not in done:
+                get.cancel()
+                await send_keepalive()
+                continue
+            message = get.result()
+            if message is None:
+                return False
+            await send_message(message)
+    finally:
+        disconnect.cancel()
+
+
+async def send_http_error(send, status, detail):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': json.dumps({'detail': detail}).encode()})
+
+
+async def event_stream(scope, receive, send, channel, expires_at):
+    headers = [
+        (b'content-type', b'text/event-stream'),
+        (b'cache-control', b'no-cache'),
+        # Keep nginx from buffering the stream.
+        (b'x-accel-buffering', b'no'),
+    ]
+    origin = dict(scope['headers']).get(b'origin', b'').decode('latin-1')
+    if origin and origin in settings.CORS_ORIGIN_WHITELIST:
+        headers += [(b'access-control-allow-origin', origin.encode('latin-1')), (b'vary', b'Origin')]
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+
+    async def send_message(message):
+        await send({'type': 'http.response.body', 'body': 'data: {}\n\n'.format(message).encode(),
+                    'more_body': True})
+
+    async def send_keepalive():
+        await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+
+    with pubsub.subscribe(channel) as subscription:
+        disconnected = await pump(subscription, receive, send_message, send_keepalive, expires_at)
+    if not disconnected:
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+async def websocket_stream(scope, receive, send, channel, expires_at):
+    await send({'type': 'websocket.accept', 'subprotocol': WEBSOCKET_TOKEN_PROTOCOL})
+
+    async def send_message(message):
+        await send({'type': 'websocket.send', 'text': message})
+
+    async def send_keepalive():
+        # The server pings idle WebSockets itself.
+        pass
+
+    with pubsub.subscribe(channel) as subscription:
+        disconnected = await pump(subscription, receive, send_message, send_keepalive, expires_at)
+    if not disconnected:
+        await send({'type': 'websocket.close', 'code': 1000})
+
+
+async def stream_application(scope, receive, send):
+    """Push new and changed rows for the feed or a phrase's comments over Server-Sent Events or a WebSocket.
+
+    Browsers cannot set headers on either. A WebSocket passes its JWT as a
+    subprotocol; an event stream passes a ticket from /api/stream_tickets/ in
+    the ticket query parameter, so no token ends up in an access log.
+    """
+    websocket = scope['type'] == 'websocket'
+    if websocket:
+        await receive()
+    elif scope['method'] != 'GET':
+        await send_http_error(send, 405, 'Method not allowed.')
+        return
+
+    channel, phrase_id = resolve_channel(scope['path'])
+    if websocket:
+        authenticate, credential = validate_token, websocket_token(scope)
+    else:
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        authenticate, credential = redeem_stream_ticket, query.get('ticket', [''])[0]
+    if channel is None:
+        status, expires_at = 404, None
+    elif not credential:
+        status, expires_at = 401, None
+    else:
+        status, expires_at = await sync_to_async(open_stream, thread_sensitive=True)(
+            authenticate, credential, phrase_id)
+
+    if status != 200:
+        if websocket:
+            await send({'type': 'websocket.close', 'code': 4000 + status})
+        else:
+            await send_http_error(send, status, 'Not found.' if status == 404 else 'Invalid or missing credentials.')
+        return
+
+    if websocket:
+        await websocket_stream(scope, receive, send, channel, expires_at)
+    else:
+        await event_stream(scope, receive, send, channel, expires_at)
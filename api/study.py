@@ -0,0 +1,64 @@
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import Phrase, ReviewState
+
+MIN_EASE = 1.3
+
+
+def schedule(state, quality, now):
+    """Apply one SM-2 review with quality 0 (blackout) to 5 (perfect recall)."""
+    if quality < 3:
+        state.repetitions = 0
+        state.interval = 1
+    else:
+        state.repetitions += 1
+        if state.repetitions == 1:
+            state.interval = 1
+        elif state.repetitions == 2:
+            state.interval = 6
+        else:
+            state.interval = round(state.interval * state.ease)
+    state.ease = max(MIN_EASE, state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    state.due_at = now + timedelta(days=state.interval)
+    state.updated_at = now
+    return state
+
+
+def build_deck(user, size, now=None):
+    """Due cards first, most overdue first, then phrases the user has never reviewed."""
+    now = now or timezone.now()
+    due = list(ReviewState.objects
+               .filter(user=user, due_at__lte=now)
+               .select_related('phrase')
+               .order_by('due_at')[:size])
+    cards = [(state.phrase, state) for state in due]
+    if len(cards) < size:
+        unseen = (Phrase.objects
+                  .filter(user=user)
+                  .exclude(review_states__user=user)
+                  .order_by('created_at', 'id')[:size - len(cards)])
+        cards.extend((phrase, None) for phrase in unseen)
+    for phrase, state in cards:
+        phrase.review_state = state
+    return [phrase for phrase, _ in cards]
+
+
+def record_reviews(user, results, now=None):
+    """Schedule a whole session's results with one read and at most two writes."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        states = {state.phrase_id: state for state in
+                  ReviewState.objects.select_for_update().filter(user=user, phrase_id__in={
+                      result['phrase'] for result in results})}
+        existing = set(states)
+        for result in results:
+            state = states.get(result['phrase'])
+            if state is None:
+                state = states[result['phrase']] = ReviewState(user=user, phrase_id=result['phrase'], due_at=now)
+            schedule(state, result['quality'], now)
+
+        ReviewState.objects.bulk_update([states[phrase_id] for phrase_id in existing],
+                                        ['due_at', 'interval', 'ease', 'repetitions', 'updated_at'])
+        ReviewState.objects.bulk_create([state for phrase_id, state in states.items() if phrase_id not in existing])
+    return list(states.values())
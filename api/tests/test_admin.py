@@ -0,0 +1,66 @@
+import re
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from .factories.comment import TestCommentFactoryWith
+from .factories.phrase import TestPhraseFactoryWith
+from .factories.user import UserFactory
+from api import admin
+from api.models import Phrase
+
+
+class ScalableAdminTest(TestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser('admin', 'admin@sample.com', 'dummy_pw')
+        self.client.force_login(self.admin_user)
+
+    def add_phrases(self, count):
+        for i in range(count):
+            user = UserFactory(username='user{}'.format(i), email='user{}@sample.com'.format(i))
+            TestCommentFactoryWith(user=user, phrase=TestPhraseFactoryWith(user=user, text='text{}'.format(i)))
+
+    def changelist_queries(self, model_name):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse('admin:api_{}_changelist'.format(model_name)))
+        self.assertEqual(res.status_code, 200)
+        return len(queries)
+
+    def test_should_not_query_per_row(self):
+        self.add_phrases(2)
+        phrase_queries, comment_queries = self.changelist_queries('phrase'), self.changelist_queries('comment')
+        self.add_phrases(5)
+
+        self.assertEqual(self.changelist_queries('phrase'), phrase_queries)
+        self.assertEqual(self.changelist_queries('comment'), comment_queries)
+
+    def test_should_not_render_every_user_in_change_form(self):
+        self.add_phrases(3)
+        res = self.client.get(reverse('admin:api_comment_change', args=[Phrase.objects.first().comments.get().pk]))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, 'admin-autocomplete')
+        self.assertEqual(len(re.findall(rb'<option value="[^"]+"', res.content)), 2)
+
+    def test_should_search_phrase_by_exact_text(self):
+        self.add_phrases(3)
+        res = self.client.get(reverse('admin:api_phrase_changelist'), {'q': '  TEXT1 '})
+
+        self.assertEqual([phrase.text for phrase in res.context['cl'].result_list], ['text1'])
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=3)
+    def test_should_cap_exact_count(self):
+        self.add_phrases(5)
+
+        self.assertEqual(admin.EstimatedCountPaginator(Phrase.objects.order_by('-id'), 100).count, 3)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=3)
+    def test_should_use_estimated_count_for_large_table(self):
+        self.add_phrases(5)
+
+        with mock.patch.object(admin, 'estimated_row_count', return_value=1000000):
+            self.assertEqual(admin.EstimatedCountPaginator(Phrase.objects.order_by('-id'), 100).count, 1000000)
+            filtered = Phrase.objects.filter(text='text1').order_by('-id')
+            self.assertEqual(admin.EstimatedCountPaginator(filtered, 100).count, 1)
@@ -0,0 +1,146 @@
+import threading
+from django.core.cache import cache
+from django.test import SimpleTestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from .factories.phrase import TestPhraseFactoryWith
+from .factories.user import TestUserFactory, UserFactory
+from api import autocomplete
+from api.autocomplete import PrefixIndex
+from api.models import Phrase
+from api.kana import katakana_to_hiragana, romaji_to_hiragana
+
+AUTOCOMPLETE_URL = '/api/phrases/autocomplete/'
+
+
+class KanaTest(SimpleTestCase):
+    def test_should_convert_katakana_to_hiragana(self):
+        self.assertEqual(katakana_to_hiragana('コーヒーください'), 'こーひーください')
+
+    def test_should_convert_romaji_to_hiragana(self):
+        self.assertEqual(romaji_to_hiragana('konnichiwa'), 'こんにちわ')
+        self.assertEqual(romaji_to_hiragana('kitte'), 'きって')
+        self.assertEqual(romaji_to_hiragana('matcha'), 'まっちゃ')
+        self.assertEqual(romaji_to_hiragana("kan'i"), 'かんい')
+
+    def test_should_drop_unfinished_syllable(self):
+        self.assertEqual(romaji_to_hiragana('arigatoug'), 'ありがとう')
+        self.assertEqual(romaji_to_hiragana('kon'), 'こ')
+
+    def test_should_not_convert_non_romaji(self):
+        self.assertIsNone(romaji_to_hiragana('xyz'))
+        self.assertIsNone(romaji_to_hiragana('こんにちは'))
+
+
+class PrefixIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex([
+            ('Break a leg', 3),
+            ('break the ice', 5),
+            ('Bread and butter', 1),
+            ('ありがとう', 2),
+            ('アイス', 1),
+        ])
+
+    def test_should_rank_by_weight(self):
+        self.assertEqual(self.index.suggest('brea'),
+                         [('break the ice', 5), ('Break a leg', 3), ('Bread and butter', 1)])
+
+    def test_should_rank_short_prefix_from_precomputed_top(self):
+        self.assertEqual(self.index.suggest('b', limit=2), [('break the ice', 5), ('Break a leg', 3)])
+
+    def test_should_match_katakana_with_hiragana(self):
+        self.assertEqual(self.index.suggest('あい'), [('アイス', 1)])
+
+    def test_should_match_romaji_input(self):
+        self.assertEqual(self.index.suggest('arig'), [('ありがとう', 2)])
+
+    def test_should_add_text_incrementally(self):
+        self.index.add('Bread and butter', weight=9)
+        self.index.add('brew', weight=1)
+
+        self.assertEqual(self.index.suggest('b', limit=1), [('Bread and butter', 10)])
+        self.assertEqual(self.index.suggest('brew'), [('brew', 1)])
+
+    def test_should_remove_text_incrementally(self):
+        self.index.remove('break the ice', weight=3)
+        self.index.remove('Bread and butter')
+
+        self.assertEqual(self.index.suggest('b', limit=2), [('Break a leg', 3), ('break the ice', 2)])
+        self.assertEqual(self.index.suggest('brea'), [('Break a leg', 3), ('break the ice', 2)])
+        self.assertEqual(len(self.index), 4)
+
+    def test_should_refill_short_prefix_top_after_remove(self):
+        index = PrefixIndex([('ba', 3), ('bb', 2), ('bc', 1)], top_size=2)
+        index.remove('ba', weight=3)
+
+        self.assertEqual(index.suggest('b'), [('bb', 2), ('bc', 1)])
+
+    def test_should_not_search_while_index_is_being_changed(self):
+        results = []
+        searcher = threading.Thread(target=lambda: results.append(self.index.suggest('brea')))
+        with self.index.lock:
+            # Stands in for an add() or remove() caught halfway through shifting the lists.
+            searcher.start()
+            searcher.join(0.05)
+            self.assertTrue(searcher.is_alive())
+        searcher.join()
+
+        self.assertEqual(len(results[0]), 3)
+
+
+class PhraseAutocompleteApiTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        autocomplete._index = None
+        self.user = TestUserFactory()
+        another_user = UserFactory(username='another_user', email='another_user@sample.com')
+        TestPhraseFactoryWith(user=self.user, text='Break a leg')
+        TestPhraseFactoryWith(user=another_user, text='break a leg')
+        TestPhraseFactoryWith(user=self.user, text='Break the ice')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='JWT {}'.format(RefreshToken.for_user(self.user).access_token))
+
+    def test_should_suggest_popular_phrases(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'brea'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'text': 'Break a leg', 'weight': 2}, {'text': 'Break the ice', 'weight': 1}])
+
+    def test_should_not_suggest_by_invalid_limit(self):
+        for limit in ('many', '0', '-1'):
+            res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'brea', 'limit': limit})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_should_reject_request_without_token(self):
+        res = APIClient().get(AUTOCOMPLETE_URL, {'prefix': 'brea'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_should_suggest_new_phrase_without_rebuild(self):
+        self.client.get(AUTOCOMPLETE_URL, {'prefix': 'b'})
+        TestPhraseFactoryWith(user=self.user, text='Bite the bullet')
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'bi'})
+        self.assertEqual(res.data, [{'text': 'Bite the bullet', 'weight': 1}])
+
+    def test_should_remove_deleted_phrase_without_rebuild(self):
+        self.client.get(AUTOCOMPLETE_URL, {'prefix': 'b'})
+        Phrase.objects.get(text='Break the ice').delete()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'break'})
+        self.assertEqual(res.data, [{'text': 'Break a leg', 'weight': 2}])
+
+    def test_should_move_edited_phrase_without_rebuild(self):
+        self.client.get(AUTOCOMPLETE_URL, {'prefix': 'b'})
+        phrase = Phrase.objects.get(text='Break the ice')
+        phrase.text = 'Bite the bullet'
+        phrase.save()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {'prefix': 'b'})
+        self.assertEqual(res.data, [{'text': 'Break a leg', 'weight': 2}, {'text': 'Bite the bullet', 'weight': 1}])
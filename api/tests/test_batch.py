@@ -0,0 +1,122 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+from .factories.phrase import TestPhraseFactoryWith
+from .factories.user import TestUserFactory
+from api.models import Phrase
+
+BATCH_URL = '/api/batch/'
+
+
+class BatchApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = TestUserFactory()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='JWT {}'.format(RefreshToken.for_user(self.user).access_token))
+
+    def test_should_run_sub_requests_with_one_authentication(self):
+        phrase = TestPhraseFactoryWith(user=self.user)
+        payload = {'requests': [
+            {'method': 'GET', 'path': '/api/login_user/'},
+            {'method': 'GET', 'path': '/api/phrases/?text_language=en'},
+            {'method': 'GET', 'path': '/api/phrases/{}/'.format(phrase.id)},
+        ]}
+
+        with mock.patch.object(JWTAuthentication, 'get_user', autospec=True,
+                               side_effect=JWTAuthentication.get_user) as get_user:
+            res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        responses = res.data['responses']
+        self.assertEqual([response['status'] for response in responses], [200, 200, 200])
+        self.assertEqual(responses[0]['body']['username'], self.user.username)
+        self.assertIn('ETag', responses[0]['headers'])
+        self.assertEqual([item['id'] for item in responses[1]['body']], [str(phrase.id)])
+        self.assertEqual(responses[2]['body']['text'], phrase.text)
+        self.assertEqual(get_user.call_count, 1)
+
+    def test_should_run_writes_in_order(self):
+        payload = {'requests': [
+            {'method': 'POST', 'path': '/api/phrases/', 'body': {
+                'text': 'batch_text', 'text_language': 'en',
+                'translated_word': 'バッチ', 'translatedWordLanguage': 'jp'}},
+            {'method': 'GET', 'path': '/api/phrases/?exact=batch_text'},
+        ], 'parallel': True}
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        responses = res.data['responses']
+        self.assertEqual(responses[0]['status'], status.HTTP_201_CREATED)
+        self.assertEqual([item['text'] for item in responses[1]['body']], ['batch_text'])
+        self.assertEqual(Phrase.objects.count(), 1)
+
+    def test_should_pass_conditional_and_idempotency_headers_per_sub_request(self):
+        etag = self.client.get('/api/login_user/')['ETag']
+        create = {'method': 'POST', 'path': '/api/phrases/', 'idempotencyKey': 'retry-1', 'body': {
+            'text': 'batch_text', 'text_language': 'en', 'translated_word': 'バッチ', 'translated_word_language': 'jp'}}
+        payload = {'requests': [
+            {'method': 'GET', 'path': '/api/login_user/', 'ifNoneMatch': etag},
+            {'method': 'GET', 'path': '/api/login_user/'},
+            create,
+            create,
+        ]}
+
+        res = self.client.post(BATCH_URL, payload, format='json', HTTP_IF_NONE_MATCH=etag)
+
+        responses = res.data['responses']
+        self.assertEqual([response['status'] for response in responses], [304, 200, 201, 201])
+        self.assertEqual(responses[3]['headers']['Idempotent-Replayed'], 'true')
+        self.assertEqual(responses[3]['body']['id'], responses[2]['body']['id'])
+        self.assertEqual(Phrase.objects.count(), 1)
+
+    def test_should_return_sub_request_errors(self):
+        phrase = TestPhraseFactoryWith(user=TestUserFactory(username='another_user', email='another@sample.com'))
+        payload = {'requests': [
+            {'method': 'DELETE', 'path': '/api/phrases/{}/'.format(phrase.id)},
+            {'method': 'GET', 'path': '/api/unknown/'},
+            {'method': 'POST', 'path': BATCH_URL, 'body': {'requests': []}},
+            {'method': 'GET', 'path': '/admin/'},
+        ]}
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([response['status'] for response in res.data['responses']], [403, 404, 404, 404])
+        self.assertTrue(Phrase.objects.filter(id=phrase.id).exists())
+
+    def test_should_apply_sub_request_permissions_without_credentials(self):
+        payload = {'requests': [{'method': 'GET', 'path': '/api/feed/'}, {'method': 'GET', 'path': '/api/login_user/'}]}
+
+        res = APIClient().post(BATCH_URL, payload, format='json')
+
+        self.assertEqual([response['status'] for response in res.data['responses']], [401, 401])
+
+    def test_should_reject_too_many_sub_requests(self):
+        payload = {'requests': [{'method': 'GET', 'path': '/api/feed/'}] * 21}
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ParallelBatchApiTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = TestUserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_should_run_reads_on_worker_pool(self):
+        phrases = [TestPhraseFactoryWith(user=self.user, text='text{}'.format(i)) for i in range(3)]
+        payload = {'requests': [{'method': 'GET', 'path': '/api/phrases/{}/'.format(phrase.id)} for phrase in phrases],
+                   'parallel': True}
+
+        res = self.client.post(BATCH_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([response['body']['text'] for response in res.data['responses']], ['text0', 'text1', 'text2'])
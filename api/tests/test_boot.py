@@ -0,0 +1,148 @@
+import os
+import runpy
+import threading
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils.functional import empty
+from rest_framework.test import APIClient
+from .factories.phrase import TestPhraseFactoryWith
+from .factories.user import TestUserFactory
+from api import autocomplete
+from api.feed import FEED_CACHE_KEY
+from friends_phrase.db.pool import ConnectionPool
+from friends_phrase.storage import LazyS3Storage
+from friends_phrase.warmup import warm_worker
+
+
+class LazyS3StorageTest(SimpleTestCase):
+    @override_settings(AWS_S3_CUSTOM_DOMAIN='bucket.s3.amazonaws.com', AWS_LOCATION='static')
+    def test_should_build_url_without_creating_s3_storage(self):
+        storage = LazyS3Storage()
+
+        self.assertEqual(storage.url('icons/default image.png'),
+                         'https://bucket.s3.amazonaws.com/static/icons/default%20image.png')
+        self.assertIs(storage._wrapped, empty)
+
+    @override_settings(AWS_S3_CUSTOM_DOMAIN='bucket.s3.amazonaws.com', AWS_LOCATION='static')
+    def test_should_match_s3_storage_url(self):
+        storage = LazyS3Storage()
+        url = storage.url('icons/default.png')
+
+        self.assertEqual(storage.bucket_name, 'friends-phrase-backet')
+        self.assertIsNot(storage._wrapped, empty)
+        self.assertEqual(storage._wrapped.url('icons/default.png'), url)
+
+
+class ProfileImportsCommandTest(SimpleTestCase):
+    def test_should_report_import_times(self):
+        out = StringIO()
+        call_command('profile_imports', '--limit', '5', '--top-level', stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertIn('django.core.wsgi', out.getvalue())
+        self.assertTrue(lines[-1].startswith('total import time'))
+
+    def test_should_fail_above_budget(self):
+        with self.assertRaises(CommandError):
+            call_command('profile_imports', '--limit', '1', '--fail-above', '0', stdout=StringIO())
+
+
+class GunicornConfigTest(SimpleTestCase):
+    def setUp(self):
+        with mock.patch.dict(os.environ, {'PORT': '5000', 'GUNICORN_THREADS': '1'}):
+            self.config = runpy.run_path(os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))
+
+    def test_should_read_overrides_from_environment(self):
+        self.assertEqual(self.config['bind'], '0.0.0.0:5000')
+        self.assertEqual((self.config['threads'], self.config['worker_class']), (1, 'sync'))
+        self.assertTrue(self.config['preload_app'])
+
+    def test_should_serve_asgi_app_on_uvicorn_workers(self):
+        environ = {'GUNICORN_ASGI': '1', 'GUNICORN_WORKERS': '1'}
+        with mock.patch.dict(os.environ, environ):
+            config = runpy.run_path(os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))
+            self.assertEqual(os.environ['WEB_CONCURRENCY'], '1')
+
+        self.assertEqual(config['wsgi_app'], 'friends_phrase.asgi:application')
+        self.assertEqual(config['worker_class'], 'uvicorn.workers.UvicornWorker')
+        self.assertEqual(self.config['wsgi_app'], 'friends_phrase.wsgi:application')
+
+    def default_workers(self, cores, memory_mb):
+        default_workers = self.config['default_workers']
+        with mock.patch.dict(default_workers.__globals__,
+                             available_cores=lambda: cores, available_memory_mb=lambda: memory_mb):
+            return default_workers()
+
+    def test_should_size_workers_from_cores_and_memory(self):
+        self.assertEqual(self.default_workers(4, 64 * 1024), 9)
+        self.assertEqual(self.default_workers(4, 3 * self.config['WORKER_MEMORY_MB']), 3)
+        self.assertEqual(self.default_workers(4, 0), 1)
+
+
+class WarmWorkerTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        autocomplete._index = None
+        self.user = TestUserFactory()
+        TestPhraseFactoryWith(user=self.user, text='Break a leg')
+        connections.close_all()
+
+    def use_pool(self, pool):
+        wrapper = type(connections['default'])
+        acquired, released = [], []
+
+        def get_new_connection(db, conn_params):
+            acquired.append(pool.acquire())
+            return acquired[-1]
+
+        def close(db):
+            released.append(db.connection)
+            pool.release(db.connection)
+
+        # The in-memory test database ignores close(), which is what hands a connection back.
+        for patcher in (mock.patch.dict(connection.settings_dict, POOL={'size': 2}),
+                        mock.patch.object(wrapper, 'is_in_memory_db', return_value=False),
+                        mock.patch.object(wrapper, 'get_new_connection', get_new_connection),
+                        mock.patch.object(wrapper, '_close', close)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Give the test database its connection back once the patches are gone.
+        self.addCleanup(lambda: setattr(connections['default'], 'connection', released[0]))
+        return acquired, released
+
+    def test_should_warm_caches_and_close_connection(self):
+        wrapper = type(connections['default'])
+        with mock.patch.object(wrapper, 'close', autospec=True, side_effect=wrapper.close) as close:
+            warm_worker()
+
+        close.assert_called_once_with(connections['default'])
+        self.assertIsNotNone(cache.get(FEED_CACHE_KEY))
+        self.assertEqual(autocomplete._index.suggest('brea'), [('Break a leg', 1)])
+
+    def test_should_hand_warmed_connection_to_request_thread(self):
+        # The pool cannot connect, so the request thread can only get the connection warmed here.
+        pool = ConnectionPool(None, size=2)
+        acquired, released = self.use_pool(pool)
+
+        warm_worker()
+        responses = []
+        request = threading.Thread(target=lambda: responses.append(self.get_phrases()))
+        request.start()
+        request.join()
+
+        self.assertIsNone(connection.connection)
+        self.assertEqual(responses[0].status_code, 200)
+        self.assertIs(acquired[0], released[0])
+
+    def get_phrases(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        return client.get(reverse('api:phrase-list'))
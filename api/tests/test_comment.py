@@ -1,10 +1,14 @@
+from unittest import mock
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from datetime import datetime
 from .factories.comment import TestCommentFactoryWith, CommentFactoryWith
 from .factories.phrase import TestPhraseFactoryWith
 from .factories.user import TestUserFactory
 from api.models import Phrase, Comment
+from api.serializers import CommentSerializer
 from django.contrib.auth import get_user_model
 from freezegun import freeze_time
 from rest_framework import status
@@ -337,3 +341,102 @@ class CommentModelTest(TestCase):
         self.assertEqual(user_count, 2)
         self.assertEqual(phrase_count, 1)
         self.assertEqual(comment_count, 0)
+
+
+def comment_thread_url(phrase_id):
+    return reverse('api:phrase-comments', args=[phrase_id])
+
+
+class CommentThreadApiTest(APITestCase):
+    def setUp(self):
+        self.user = TestUserFactory()
+        self.phrase = TestPhraseFactoryWith(user=self.user)
+        self.comments = []
+        for index in range(5):
+            # Two comments share a timestamp so the id tie-breaker is exercised.
+            with freeze_time(datetime(2022, 2, 22, 2, 22, min(index, 3))):
+                self.comments.append(CommentFactoryWith(user=self.user, phrase=self.phrase, text='text_%d' % index))
+        other_phrase = TestPhraseFactoryWith(user=self.user, text='other_text')
+        CommentFactoryWith(user=self.user, phrase=other_phrase, text='other_comment')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def collect_pages(self, params):
+        ids = []
+        res = self.client.get(comment_thread_url(self.phrase.id), params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            ids += [comment['id'] for comment in res.data['results']]
+            if res.data['next'] is None:
+                return ids
+            res = self.client.get(res.data['next'])
+
+    def test_should_return_thread_newest_first(self):
+        ids = self.collect_pages({'page_size': 2})
+
+        self.assertEqual(ids, [str(comment.id) for comment in reversed(self.comments)])
+
+    def test_should_return_thread_oldest_first(self):
+        ids = self.collect_pages({'page_size': 2, 'order': 'oldest'})
+
+        self.assertEqual(ids, [str(comment.id) for comment in self.comments])
+
+    def test_should_return_nested_user_in_bounded_queries(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(comment_thread_url(self.phrase.id))
+
+        self.assertEqual(res.data['results'][0]['user']['username'], self.user.username)
+
+    def test_should_serialize_thread_with_request_context(self):
+        with mock.patch('api.views.CommentSerializer', wraps=CommentSerializer) as serializer:
+            self.client.get(comment_thread_url(self.phrase.id))
+
+        self.assertIn('request', serializer.call_args[1]['context'])
+
+    def test_should_not_return_thread_with_invalid_cursor(self):
+        res = self.client.get(comment_thread_url(self.phrase.id), {'cursor': 'invalid'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_should_not_return_thread_with_not_exists(self):
+        self.phrase.delete()
+        res = self.client.get(comment_thread_url(self.phrase.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+def comment_writes(queries):
+    table = connection.ops.quote_name('api_comment')
+    return [query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith(('INSERT INTO {} '.format(table), 'UPDATE {} '.format(table)))]
+
+
+class CommentWriteQueryTest(APITestCase):
+    def setUp(self):
+        self.user = TestUserFactory()
+        self.phrase = TestPhraseFactoryWith(user=TestUserFactory(email='phrase_user@sample.com'))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_should_create_comment_with_single_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            Comment.objects.create_comment(text='text', text_language='en', user=self.user, phrase=self.phrase)
+
+        writes = comment_writes(queries)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT'))
+
+    def test_should_write_only_changed_fields_when_partial_update(self):
+        comment = TestCommentFactoryWith(user=self.user, phrase=self.phrase)
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(detail_comment_url(comment.id), {'text': 'updated', 'phrase': self.phrase.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        writes = comment_writes(queries)
+        self.assertEqual(len(writes), 1)
+        set_clause = writes[0].split(' SET ', 1)[1].rsplit(' WHERE ', 1)[0]
+        self.assertEqual(set_clause.count(' = '), 2)
+        self.assertIn(connection.ops.quote_name('text') + ' = ', set_clause)
+        self.assertIn(connection.ops.quote_name('updated_at') + ' = ', set_clause)
@@ -0,0 +1,121 @@
+import gzip
+import json
+import zlib
+from unittest import mock, skipUnless
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from .factories.phrase import TestPhraseFactoryWith
+from .factories.user import TestUserFactory
+from api import compression
+from api.compression import negotiate_encoding
+from api.middleware import CompressionMiddleware
+
+PHRASES_URL = '/api/phrases/'
+LOGIN_USER_URL = '/api/login_user/'
+FEED_URL = '/api/feed/'
+
+
+class NegotiateEncodingTest(SimpleTestCase):
+    @mock.patch.object(compression, 'brotli', None)
+    def test_should_fall_back_to_gzip_without_brotli(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'gzip')
+        self.assertIsNone(negotiate_encoding('br'))
+
+    def test_should_respect_quality_values(self):
+        self.assertEqual(negotiate_encoding('br;q=0, gzip;q=0.5'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0, identity'))
+        self.assertIsNone(negotiate_encoding(''))
+        self.assertEqual(negotiate_encoding('*'), compression.available_encodings()[0])
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_should_prefer_brotli(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'br')
+
+
+class CompressionMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = TestUserFactory()
+        for i in range(20):
+            TestPhraseFactoryWith(user=self.user, text='test_text {}'.format(i))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_should_compress_large_response(self):
+        plain = self.client.get(PHRASES_URL)
+        res = self.client.get(PHRASES_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertEqual(int(res['Content-Length']), len(res.content))
+
+    def test_should_not_compress_without_accept_encoding(self):
+        res = self.client.get(PHRASES_URL)
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertEqual(len(json.loads(res.content)), 20)
+
+    def test_should_not_compress_small_response(self):
+        res = self.client.get('{}?text_language=jp'.format(PHRASES_URL), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertNotIn('Accept-Encoding', res['Vary'])
+
+    @override_settings(COMPRESSION_MIN_SIZE=1)
+    def test_should_compress_cacheable_response_once(self):
+        # Long enough that gzip always shrinks the body, whatever the icon URL looks like.
+        self.user.username = 'compressible_' * 10
+        self.user.save(update_fields=['username'])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='JWT {}'.format(RefreshToken.for_user(self.user).access_token))
+        client.get(LOGIN_USER_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        with mock.patch.object(compression, 'compress', wraps=compression.compress) as compress:
+            res = client.get(LOGIN_USER_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertFalse(compress.called)
+        self.assertTrue(res['ETag'].startswith('W/"'))
+        self.assertEqual(json.loads(gzip.decompress(res.content))['username'], self.user.username)
+
+        res = client.get(LOGIN_USER_URL, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_should_compress_feed_once(self):
+        self.client.get(FEED_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        with mock.patch.object(compression, 'compress', wraps=compression.compress) as compress:
+            res = self.client.get(FEED_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertFalse(compress.called)
+        self.assertEqual(len(json.loads(gzip.decompress(res.content))), 20)
+
+        res = self.client.get(FEED_URL, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class StreamingCompressionTest(SimpleTestCase):
+    def test_should_compress_stream_incrementally(self):
+        produced = []
+
+        def events():
+            for i in range(3):
+                produced.append(i)
+                yield 'data: {}\n\n'.format(i).encode()
+
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(events(), content_type='text/event-stream'))
+        response = middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = iter(response.streaming_content)
+        self.assertEqual(decompressor.decompress(next(chunks)), b'data: 0\n\n')
+        self.assertEqual(produced, [0])
+        self.assertEqual(b''.join(decompressor.decompress(chunk) for chunk in chunks), b'data: 1\n\ndata: 2\n\n')
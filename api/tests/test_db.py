@@ -0,0 +1,166 @@
+import os
+import tempfile
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from .factories.user import TestUserFactory
+from api.models import Phrase
+from friends_phrase.db.pool import ConnectionPool, PoolTimeout
+from friends_phrase.db.routers import PrimaryReplicaRouter, replica_reads, pin_to_primary, is_pinned_to_primary
+
+
+class DummyConnection:
+    def __init__(self, usable=True):
+        self.usable = usable
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def test_should_reuse_released_connection(self):
+        pool = ConnectionPool(DummyConnection, size=2)
+        conn = pool.acquire()
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(pool.created, 1)
+
+    def test_should_create_connections_up_to_size(self):
+        pool = ConnectionPool(DummyConnection, size=2, timeout=0.01)
+        pool.acquire()
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+    def test_should_replace_connection_failing_check(self):
+        pool = ConnectionPool(DummyConnection, size=1, check=lambda conn: conn.usable)
+        conn = pool.acquire()
+        conn.usable = False
+        pool.release(conn)
+        new_conn = pool.acquire()
+
+        self.assertIsNot(new_conn, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.created, 1)
+
+    def test_should_not_count_failed_connect(self):
+        def connect():
+            raise OSError('refused')
+        pool = ConnectionPool(connect, size=1)
+
+        with self.assertRaises(OSError):
+            pool.acquire()
+        self.assertEqual(pool.created, 0)
+
+
+class BenchDbConnectionsCommandTest(TransactionTestCase):
+    def test_should_report_saving_per_request(self):
+        out = StringIO()
+        call_command('bench_db_connections', requests=5, stdout=out)
+
+        self.assertIn('saved', out.getvalue())
+
+
+REPLICA = 'replica_test'
+PHRASE_PAYLOAD = {'text': 'test_text',
+                  'text_language': 'en',
+                  'translated_word': 'テスト テキスト',
+                  'translated_word_language': 'jp',
+                  }
+
+
+class SQLiteReplicaTestCase(TestCase):
+    """Runs against a second SQLite database standing in for a replica that has not caught up yet."""
+    # The replica is added in setUpClass, after the test runner has set up the databases it knows about.
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        name = os.path.join(cls.replica_dir.name, 'replica.sqlite3')
+        connections.databases[REPLICA] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name, 'TEST': {'NAME': name}}
+        connections.ensure_defaults(REPLICA)
+        connections.prepare_test_settings(REPLICA)
+        call_command('migrate', database=REPLICA, verbosity=0)
+        cls.replica_settings = override_settings(DATABASE_REPLICAS=[REPLICA])
+        cls.replica_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.replica_settings.disable()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        cls.replica_dir.cleanup()
+
+    def replicate(self, *objs):
+        for obj in objs:
+            type(obj).objects.using(REPLICA).bulk_create([obj])
+
+
+class PrimaryReplicaRouterTest(SQLiteReplicaTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.user = TestUserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_should_read_from_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Phrase), 'default')
+
+    def test_should_read_from_replica_in_replica_reads(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Phrase), REPLICA)
+        self.assertEqual(self.router.db_for_read(Phrase), 'default')
+
+    def test_should_write_to_primary_in_replica_reads(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Phrase), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_should_read_from_primary_without_replicas(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Phrase), 'default')
+
+    def test_should_pin_user_to_primary(self):
+        self.assertFalse(is_pinned_to_primary(self.user))
+        pin_to_primary(self.user)
+
+        self.assertTrue(is_pinned_to_primary(self.user))
+
+    def test_should_send_safe_request_to_replica(self):
+        phrase = Phrase.objects.create_phrase(user=self.user, **PHRASE_PAYLOAD)
+        res = self.client.get('/api/phrases/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 0)
+
+        self.replicate(self.user, phrase)
+        with CaptureQueriesContext(connections['default']) as primary_queries:
+            res = self.client.get('/api/phrases/')
+        self.assertEqual(len(res.data), 1)
+        self.assertFalse(any('api_phrase' in query['sql'] for query in primary_queries.captured_queries))
+
+    def test_should_stick_to_primary_after_write(self):
+        res = self.client.post('/api/phrases/', PHRASE_PAYLOAD)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(is_pinned_to_primary(self.user))
+
+        with CaptureQueriesContext(connections[REPLICA]) as replica_queries:
+            res = self.client.get('/api/phrases/')
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(replica_queries.captured_queries, [])
+
+        cache.clear()
+        res = self.client.get('/api/phrases/')
+        self.assertEqual(len(res.data), 0)
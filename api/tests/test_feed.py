@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from .factories.comment import TestCommentFactoryWith
+from .factories.phrase import TestPhraseFactoryWith
+from .factories.user import TestUserFactory
+from api.feed import FEED_CACHE_KEY
+
+FEED_URL = '/api/feed/'
+
+
+@override_settings(FEED_SIZE=2)
+class RecentPhraseFeedTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = TestUserFactory()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='JWT {}'.format(RefreshToken.for_user(self.user).access_token))
+
+    def feed_ids(self):
+        res = self.client.get(FEED_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [phrase['id'] for phrase in res.data]
+
+    def test_should_rebuild_feed_from_db_on_miss(self):
+        first = TestPhraseFactoryWith(user=self.user, text='first')
+        second = TestPhraseFactoryWith(user=self.user, text='second')
+        cache.clear()
+
+        self.assertEqual(self.feed_ids(), [str(second.id), str(first.id)])
+        self.assertIsNotNone(cache.get(FEED_CACHE_KEY))
+
+    def test_should_serve_feed_without_db_queries(self):
+        TestPhraseFactoryWith(user=self.user)
+        self.feed_ids()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.feed_ids()
+        self.assertEqual(len(queries), 0)
+
+    def test_should_push_new_phrase_and_keep_size(self):
+        first = TestPhraseFactoryWith(user=self.user, text='first')
+        self.feed_ids()
+        second = TestPhraseFactoryWith(user=self.user, text='second')
+        third = TestPhraseFactoryWith(user=self.user, text='third')
+
+        self.assertEqual(self.feed_ids(), [str(third.id), str(second.id)])
+        self.assertNotIn(str(first.id), self.feed_ids())
+
+    def test_should_refresh_phrase_when_comment_added(self):
+        phrase = TestPhraseFactoryWith(user=self.user)
+        self.feed_ids()
+        comment = TestCommentFactoryWith(user=self.user, phrase=phrase)
+
+        res = self.client.get(FEED_URL)
+        self.assertEqual(res.data[0]['comments'], [comment.id])
+
+    def test_should_drop_deleted_phrase(self):
+        first = TestPhraseFactoryWith(user=self.user, text='first')
+        second = TestPhraseFactoryWith(user=self.user, text='second')
+        self.feed_ids()
+        second.delete()
+
+        self.assertEqual(self.feed_ids(), [str(first.id)])
+
+    def test_should_reflect_username_change(self):
+        TestPhraseFactoryWith(user=self.user)
+        self.feed_ids()
+        self.user.username = 'updated_username'
+        self.user.save()
+
+        res = self.client.get(FEED_URL)
+        self.assertEqual(res.data[0]['user']['username'], 'updated_username')
+
+    def test_should_reject_request_without_token(self):
+        res = APIClient().get(FEED_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,59 @@
+import json
+from unittest import mock
+from django.db import OperationalError, connection
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import TestCase, override_settings
+from api import health
+
+HEALTHZ_URL = '/healthz'
+READYZ_URL = '/readyz'
+
+
+class HealthCheckTest(TestCase):
+    def setUp(self):
+        health._readiness = None
+
+    def test_should_answer_liveness_without_touching_the_stack(self):
+        with self.assertNumQueries(0):
+            res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'ok')
+        self.assertFalse(res.has_header('Vary'))
+        self.assertFalse(res.has_header('X-Frame-Options'))
+
+    def test_should_report_ready(self):
+        res = self.client.get(READYZ_URL + '/')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.content), {'database': 'ok', 'migrations': 'ok', 'storage': 'ok'})
+
+    def test_should_cache_readiness(self):
+        self.client.get(READYZ_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(READYZ_URL)
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(READINESS_CACHE_SECONDS=0)
+    def test_should_not_be_ready_when_database_is_down(self):
+        with mock.patch.object(connection, 'cursor', side_effect=OperationalError('Connection refused')):
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(json.loads(res.content)['database'], 'Connection refused')
+
+    @override_settings(READINESS_CACHE_SECONDS=0)
+    def test_should_not_be_ready_with_unapplied_migrations(self):
+        MigrationRecorder.Migration.objects.filter(app='api').order_by('-id')[:1].get().delete()
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(json.loads(res.content)['migrations'], '1 unapplied migrations')
+
+    @override_settings(READINESS_CACHE_SECONDS=0, AWS_STORAGE_BUCKET_NAME='')
+    def test_should_not_be_ready_without_storage(self):
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(json.loads(res.content)['storage'], 'AWS_STORAGE_BUCKET_NAME is not set')
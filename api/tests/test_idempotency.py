@@ -0,0 +1,104 @@
+from unittest import mock
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from .factories.phrase import TestPhraseFactoryWith
+from .factories.user import TestUserFactory
+from api.idempotency import idempotency_cache_key
+from api.models import Phrase, Comment
+
+CREATE_PHRASE_URL = '/api/phrases/'
+CREATE_COMMENT_URL = '/api/comments/'
+PHRASE_PAYLOAD = {
+    'text': 'test_text',
+    'text_language': 'en',
+    'translated_word': 'テスト テキスト',
+    'translated_word_language': 'jp',
+}
+
+
+class IdempotencyKeyTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = TestUserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_should_replay_phrase_create(self):
+        res = self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='retry-1')
+        replay = self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='retry-1')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.data['id'], res.data['id'])
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertFalse(res.has_header('Idempotent-Replayed'))
+        self.assertEqual(Phrase.objects.count(), 1)
+
+    def test_should_replay_comment_create(self):
+        phrase = TestPhraseFactoryWith(user=TestUserFactory(email='phrase_user@sample.com'))
+        payload = {'text': 'text', 'text_language': 'en', 'phrase': phrase.id}
+        res = self.client.post(CREATE_COMMENT_URL, payload, HTTP_IDEMPOTENCY_KEY='retry-1')
+        replay = self.client.post(CREATE_COMMENT_URL, payload, HTTP_IDEMPOTENCY_KEY='retry-1')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.data['id'], res.data['id'])
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_should_create_again_without_key_or_with_new_key(self):
+        self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD)
+        self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD)
+        self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='retry-2')
+
+        self.assertEqual(Phrase.objects.count(), 4)
+
+    def test_should_scope_key_to_user(self):
+        self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='retry-1')
+        other_client = APIClient()
+        other_client.force_authenticate(user=TestUserFactory(email='other@sample.com'))
+        res = other_client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='retry-1')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(res.has_header('Idempotent-Replayed'))
+        self.assertEqual(Phrase.objects.count(), 2)
+
+    def test_should_reject_key_reused_with_different_body(self):
+        self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='retry-1')
+        res = self.client.post(CREATE_PHRASE_URL, dict(PHRASE_PAYLOAD, text='other'),
+                               HTTP_IDEMPOTENCY_KEY='retry-1')
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Phrase.objects.count(), 1)
+
+    def test_should_reject_key_in_progress(self):
+        cache.add(idempotency_cache_key(self.user.pk, 'retry-1') + ':lock', 1)
+        res = self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='retry-1')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Phrase.objects.count(), 0)
+
+    def test_should_not_store_failed_request(self):
+        res = self.client.post(CREATE_PHRASE_URL, {'text': ''}, HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Phrase.objects.count(), 1)
+
+    def test_should_store_response_with_ttl(self):
+        with mock.patch('api.idempotency.cache.set', wraps=cache.set) as cache_set, \
+                self.settings(IDEMPOTENCY_KEY_TTL=60):
+            self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='x' * 255)
+
+        key = idempotency_cache_key(self.user.pk, 'x' * 255)
+        stored = [call for call in cache_set.call_args_list if call[0][0] == key]
+        self.assertEqual(len(stored), 1)
+        self.assertLess(len(key), 80)
+        self.assertEqual(stored[0][1]['timeout'], 60)
+
+    def test_should_reject_long_key(self):
+        res = self.client.post(CREATE_PHRASE_URL, PHRASE_PAYLOAD, HTTP_IDEMPOTENCY_KEY='x' * 256)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Phrase.objects.count(), 0)
@@ -0,0 +1,129 @@
+import email
+import smtplib
+import socketserver
+import threading
+from unittest import mock
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives, send_mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api import mail as outbox
+from api.models import OutboxEmail
+
+
+class FlakyEmailBackend(EmailBackend):
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyEmailBackend.failures:
+            FlakyEmailBackend.failures -= 1
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='api.mail.OutboxEmailBackend',
+                   OUTBOX_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OutboxEmailTest(TestCase):
+    def test_should_queue_email_instead_of_sending(self):
+        self.assertEqual(send_mail('subject', 'body', 'from@sample.com', ['to@sample.com']), 1)
+
+        self.assertEqual(mail.outbox, [])
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.subject, email.status, email.message['to']), ('subject', 'pending', ['to@sample.com']))
+
+    def test_should_send_queued_emails_over_one_connection(self):
+        message = EmailMultiAlternatives('activate', 'text', 'from@sample.com', ['to@sample.com'],
+                                         cc=['cc@sample.com'], headers={'X-Flow': 'activation'})
+        message.attach_alternative('<p>html</p>', 'text/html')
+        message.attach('note.txt', 'attached', 'text/plain')
+        message.send()
+        send_mail('second', 'body', 'from@sample.com', ['another@sample.com'])
+
+        with mock.patch.object(outbox, 'get_connection', wraps=outbox.get_connection) as get_connection:
+            self.assertEqual(outbox.send_outbox(), (2, 0))
+
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual([sent.subject for sent in mail.outbox], ['activate', 'second'])
+        sent = mail.outbox[0]
+        self.assertEqual((sent.cc, sent.extra_headers), (['cc@sample.com'], {'X-Flow': 'activation'}))
+        self.assertEqual(sent.alternatives, [('<p>html</p>', 'text/html')])
+        self.assertEqual(sent.attachments, [('note.txt', 'attached', 'text/plain')])
+        self.assertFalse(OutboxEmail.objects.exclude(status='sent').exists())
+        self.assertEqual(outbox.send_outbox(), (0, 0))
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='api.tests.test_mail.FlakyEmailBackend', OUTBOX_MAX_ATTEMPTS=2)
+    def test_should_retry_with_backoff_then_give_up(self):
+        send_mail('subject', 'body', 'from@sample.com', ['to@sample.com'])
+        FlakyEmailBackend.failures = 2
+
+        self.assertEqual(outbox.send_outbox(), (0, 1))
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertIn('SMTPServerDisconnected', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(outbox.send_outbox(), (0, 0))
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.send_outbox(), (0, 1))
+        self.assertEqual(OutboxEmail.objects.get().status, 'failed')
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='api.tests.test_mail.FlakyEmailBackend')
+    def test_should_keep_sending_batch_after_one_failure(self):
+        send_mail('first', 'body', 'from@sample.com', ['to@sample.com'])
+        send_mail('second', 'body', 'from@sample.com', ['to@sample.com'])
+        FlakyEmailBackend.failures = 1
+
+        self.assertEqual(outbox.send_outbox(), (1, 1))
+        self.assertEqual([sent.subject for sent in mail.outbox], ['second'])
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for Django's backend: accept every command and keep each DATA payload."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 localhost')
+        while True:
+            line = self.rfile.readline().decode().rstrip('\r\n')
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'DATA':
+                self.reply('354 end with <CRLF>.<CRLF>')
+                data = []
+                for data_line in iter(self.rfile.readline, b'.\r\n'):
+                    data.append(data_line)
+                self.server.messages.append(email.message_from_bytes(b''.join(data)))
+                self.reply('250 queued')
+            else:
+                self.reply('250 ok')
+
+
+@override_settings(EMAIL_BACKEND='api.mail.OutboxEmailBackend',
+                   OUTBOX_EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                   EMAIL_HOST='127.0.0.1', EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+                   EMAIL_USE_TLS=False, EMAIL_USE_SSL=False)
+class OutboxSMTPTest(TestCase):
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPStandInHandler)
+        self.server.messages = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_should_deliver_queued_email_over_smtp(self):
+        send_mail('subject', 'body', 'from@sample.com', ['to@sample.com'])
+
+        with self.settings(EMAIL_PORT=self.server.server_address[1]):
+            self.assertEqual(outbox.send_outbox(), (1, 0))
+
+        self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertEqual(self.server.messages[0]['Subject'], 'subject')
+        self.assertEqual(self.server.messages[0]['To'], 'to@sample.com')
+        self.assertEqual(self.server.messages[0].get_payload().strip(), 'body')
@@ -0,0 +1,50 @@
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from .factories.user import TestUserFactory
+
+FEED_URL = '/api/feed/'
+ADMIN_LOGIN_URL = '/admin/login/'
+
+
+class SessionPathMiddlewareTest(TestCase):
+    def test_should_skip_browser_middleware_for_api(self):
+        client = Client(enforce_csrf_checks=True)
+        client.cookies['sessionid'] = 'unused'
+        token = RefreshToken.for_user(TestUserFactory()).access_token
+        res = client.get(FEED_URL, HTTP_AUTHORIZATION='JWT {}'.format(token))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(hasattr(res.wsgi_request, 'session'))
+        self.assertFalse(res.has_header('X-Frame-Options'))
+
+    def test_should_not_require_csrf_token_for_api(self):
+        payload = {'email': 'test_email@sample.com', 'password': 'dummy_pw'}
+        TestUserFactory(password='dummy_pw')
+        res = Client(enforce_csrf_checks=True).post('/authen/jwt/create/', payload)
+
+        self.assertNotEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_should_keep_browser_middleware_for_admin(self):
+        res = self.client.get(ADMIN_LOGIN_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(hasattr(res.wsgi_request, 'session'))
+        self.assertIn('csrftoken', res.cookies)
+        self.assertEqual(res['X-Frame-Options'], 'DENY')
+
+    def test_should_enforce_csrf_for_admin(self):
+        get_user_model().objects.create_superuser('admin', 'admin@sample.com', 'dummy_pw')
+        res = Client(enforce_csrf_checks=True).post(ADMIN_LOGIN_URL, {'username': 'admin@sample.com',
+                                                                      'password': 'dummy_pw'})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_should_benchmark_middleware_chains(self):
+        out = StringIO()
+        call_command('bench_middleware', '--requests', '20', stdout=out)
+
+        self.assertIn('saved', out.getvalue())
@@ -1,18 +1,26 @@
-from django.test import TestCase
+import re
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from datetime import datetime
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APITestCase, APIClient
 from .factories.phrase import TestPhraseFactoryWith, PhraseFactoryWith
 from .factories.user import TestUserFactory, UserFactory
-from api.models import Phrase
+from api.models import Phrase, PhraseTrigram, LanguagePairCount
 from django.contrib.auth import get_user_model
 from freezegun import freeze_time
 from api.serializers import PhraseSerializer
+from api.text import text_hash
 
 DT = datetime(2022, 2, 22, 2, 22)
 UPDATE_DT = datetime(2022, 3, 22, 2, 22)
 CREATE_PHRASE_URL = '/api/phrases/'
+FACETS_URL = '/api/phrases/facets/'
+SIMILAR_URL = '/api/phrases/similar/'
 
 
 def detail_phrase_url(phrase_id):
@@ -365,3 +373,255 @@ class PhraseModelTest(TestCase):
 
         self.assertEqual(user_count, 1)
         self.assertEqual(phrase_count, 0)
+
+
+class PhraseLanguagePairTest(APITestCase):
+    def setUp(self):
+        self.user = TestUserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.en_jp_phrase = TestPhraseFactoryWith(user=self.user, text='en_jp_text')
+        self.jp_en_phrase = TestPhraseFactoryWith(user=self.user, text='jp_en_text',
+                                                  text_language='jp', translated_word_language='en')
+
+    def test_should_filter_phrases_by_language_pair(self):
+        res = self.client.get(CREATE_PHRASE_URL, {'text_language': 'jp', 'translated_word_language': 'en'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([phrase['id'] for phrase in res.data], [str(self.jp_en_phrase.id)])
+
+    def test_should_return_language_pair_facets(self):
+        TestPhraseFactoryWith(user=self.user, text='another_en_jp_text')
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), [
+            {'textLanguage': 'en', 'translatedWordLanguage': 'jp', 'count': 2},
+            {'textLanguage': 'jp', 'translatedWordLanguage': 'en', 'count': 1},
+        ])
+
+    def test_should_move_facet_count_when_language_pair_changed(self):
+        phrase = Phrase.objects.get(id=self.en_jp_phrase.id)
+        phrase.text_language = 'jp'
+        phrase.translated_word_language = 'en'
+        phrase.save()
+
+        self.assertEqual(LanguagePairCount.objects.get(text_language='en').count, 0)
+        self.assertEqual(LanguagePairCount.objects.get(text_language='jp').count, 2)
+
+    def test_should_decrement_facet_count_when_delete_phrase(self):
+        Phrase.objects.filter(text_language='en').delete()
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.json(), [{'textLanguage': 'jp', 'translatedWordLanguage': 'en', 'count': 1}])
+
+    def test_should_not_decrement_facet_count_below_zero(self):
+        LanguagePairCount.objects.filter(text_language='en').update(count=0)
+        self.en_jp_phrase.delete()
+
+        self.assertEqual(LanguagePairCount.objects.get(text_language='en').count, 0)
+
+    def test_should_not_group_phrases_when_return_facets(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(FACETS_URL)
+
+        self.assertFalse(any('api_phrase' in query['sql'] for query in queries.captured_queries))
+
+
+class PhraseExactMatchTest(APITestCase):
+    def setUp(self):
+        self.user = TestUserFactory()
+        self.another_user = UserFactory(username='another_user', email='another_user@sample.com')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.payload = {'text': 'Break a leg',
+                        'text_language': 'en',
+                        'translated_word': '頑張って',
+                        'translated_word_language': 'jp',
+                        }
+
+    def test_should_store_normalized_text_hash(self):
+        phrase = TestPhraseFactoryWith(user=self.user, text='  Break   a LEG ')
+
+        self.assertEqual(phrase.text_hash, text_hash('break a leg'))
+
+    def test_should_update_text_hash_with_update_fields(self):
+        phrase = TestPhraseFactoryWith(user=self.user, text='Break a leg')
+        phrase.text = 'Good luck'
+        phrase.save(update_fields=['text'])
+        phrase.refresh_from_db()
+
+        self.assertEqual(phrase.text_hash, text_hash('good luck'))
+
+    def test_should_fill_text_hash_with_bulk_create(self):
+        Phrase.objects.bulk_create([Phrase(user=self.user, text='Break a leg', text_language='en',
+                                           translated_word='頑張って', translated_word_language='jp')])
+
+        self.assertEqual(Phrase.objects.get().text_hash, text_hash('break a leg'))
+
+    def test_should_find_everyone_who_saved_phrase(self):
+        mine = TestPhraseFactoryWith(user=self.user, text='Break a leg')
+        theirs = TestPhraseFactoryWith(user=self.another_user, text='break a  leg')
+        TestPhraseFactoryWith(user=self.user, text='Break the ice')
+
+        res = self.client.get(CREATE_PHRASE_URL, {'exact': 'BREAK A LEG'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(phrase['id'] for phrase in res.data), sorted([str(mine.id), str(theirs.id)]))
+
+    def test_should_allow_duplicate_phrase_by_default(self):
+        TestPhraseFactoryWith(user=self.user, text='Break a leg')
+        res = self.client.post(CREATE_PHRASE_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(PHRASE_REJECT_DUPLICATES=True)
+    def test_should_reject_duplicate_phrase(self):
+        TestPhraseFactoryWith(user=self.user, text='break a leg')
+        res = self.client.post(CREATE_PHRASE_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['text'][0], 'You have already saved this phrase.')
+
+    @override_settings(PHRASE_REJECT_DUPLICATES=True)
+    def test_should_reject_duplicate_saved_after_validation(self):
+        serializer = PhraseSerializer(data=self.payload, context={'request': mock.Mock(user=self.user)})
+        self.assertTrue(serializer.is_valid())
+        TestPhraseFactoryWith(user=self.user, text='break a leg')
+
+        with self.assertRaises(ValidationError) as raised:
+            serializer.save(user=self.user)
+        self.assertEqual(raised.exception.detail['text'][0], 'You have already saved this phrase.')
+        self.assertEqual(Phrase.objects.filter(user=self.user).count(), 1)
+
+    @override_settings(PHRASE_REJECT_DUPLICATES=True)
+    def test_should_allow_phrase_saved_by_another_user(self):
+        TestPhraseFactoryWith(user=self.another_user, text='Break a leg')
+        res = self.client.post(CREATE_PHRASE_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(PHRASE_REJECT_DUPLICATES=True)
+    def test_should_update_phrase_keeping_own_text(self):
+        phrase = TestPhraseFactoryWith(user=self.user, text='Break a leg')
+        res = self.client.put(detail_phrase_url(phrase.id), self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class PhraseSimilarTest(APITestCase):
+    def setUp(self):
+        self.user = TestUserFactory()
+        self.another_user = UserFactory(username='another_user', email='another_user@sample.com')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.close = TestPhraseFactoryWith(user=self.another_user, text='break a leg')
+        self.closer = TestPhraseFactoryWith(user=self.another_user, text='break a leg!')
+        TestPhraseFactoryWith(user=self.another_user, text='piece of cake')
+
+    def test_should_return_similar_phrases_by_score(self):
+        res = self.client.get(SIMILAR_URL, {'q': 'Break a leg!'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([phrase['id'] for phrase in res.data], [str(self.closer.id), str(self.close.id)])
+        self.assertEqual(res.data[0]['similarity'], 1.0)
+        self.assertLess(res.data[1]['similarity'], 1.0)
+
+    def test_should_not_return_own_phrases(self):
+        TestPhraseFactoryWith(user=self.user, text='break a leg!')
+        res = self.client.get(SIMILAR_URL, {'q': 'break a leg!', 'limit': 1})
+
+        self.assertEqual([phrase['id'] for phrase in res.data], [str(self.closer.id)])
+
+    def test_should_match_japanese_phrases(self):
+        phrase = TestPhraseFactoryWith(user=self.another_user, text='よろしくお願いします', text_language='jp')
+        res = self.client.get(SIMILAR_URL, {'q': 'よろしくお願いいたします'})
+
+        self.assertEqual(res.data[0]['id'], str(phrase.id))
+
+    def test_should_reindex_phrase_when_text_changed(self):
+        self.close.text = 'spill the beans'
+        self.close.save()
+        res = self.client.get(SIMILAR_URL, {'q': 'spill the beans'})
+
+        self.assertEqual(res.data[0]['id'], str(self.close.id))
+        self.assertFalse(PhraseTrigram.objects.filter(phrase=self.close, trigram='leg').exists())
+
+    def test_should_return_empty_list_by_blank_query(self):
+        res = self.client.get(SIMILAR_URL, {'q': '  '})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_should_not_return_similar_phrases_by_invalid_limit(self):
+        for limit in ('many', '0', '-1'):
+            res = self.client.get(SIMILAR_URL, {'q': 'break', 'limit': limit})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def phrase_writes(queries):
+    table = connection.ops.quote_name('api_phrase')
+    return [query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith(('INSERT INTO {} '.format(table), 'UPDATE {} '.format(table)))]
+
+
+def updated_columns(sql):
+    set_clause = sql.split(' SET ', 1)[1].rsplit(' WHERE ', 1)[0]
+    return re.findall(r'[`"](\w+)[`"] = ', set_clause)
+
+
+class PhraseWriteQueryTest(APITestCase):
+    def setUp(self):
+        self.user = TestUserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_should_create_phrase_with_single_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            Phrase.objects.create_phrase(user=self.user, text='test_text', text_language='en',
+                                         translated_word='test_translated_word', translated_word_language='jp')
+
+        writes = phrase_writes(queries)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT'))
+
+    def test_should_create_phrase_from_api_with_single_insert(self):
+        payload = {'text': 'test_text', 'text_language': 'en',
+                   'translated_word': 'テスト テキスト', 'translated_word_language': 'jp'}
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(CREATE_PHRASE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        writes = phrase_writes(queries)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT'))
+
+    def test_should_write_only_changed_fields_when_partial_update(self):
+        phrase = TestPhraseFactoryWith(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(detail_phrase_url(phrase.id), {'translated_word': 'updated'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        writes = phrase_writes(queries)
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(updated_columns(writes[0]), ['translated_word', 'updated_at'])
+
+    def test_should_write_text_hash_with_text_when_partial_update(self):
+        phrase = TestPhraseFactoryWith(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch(detail_phrase_url(phrase.id), {'text': 'updated'})
+
+        writes = phrase_writes(queries)
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(sorted(updated_columns(writes[0])), ['text', 'text_hash', 'updated_at'])
+        phrase.refresh_from_db()
+        self.assertEqual(phrase.text_hash, text_hash('updated'))
+
+    def test_should_not_write_unchanged_phrase(self):
+        phrase = TestPhraseFactoryWith(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(detail_phrase_url(phrase.id), {'text': phrase.text})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(phrase_writes(queries), [])
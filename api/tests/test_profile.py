@@ -1,10 +1,13 @@
 from datetime import datetime
+from django.core.cache import cache
 from django.urls import reverse
-from django.test import TestCase
-from rest_framework import status
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from rest_framework import status, viewsets
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 from .factories.user import TestUserFactory
 from .factories.profile import TestProfileFactoryWith
+from api.mixins import CachedRetrieveMixin
 from api.models import Profile
 from django.contrib.auth import get_user_model
 from freezegun import freeze_time
@@ -14,6 +17,7 @@ DT = datetime(2022, 2, 22, 2, 22)
 UPDATE_DT = datetime(2022, 3, 22, 2, 22)
 CREATE_PROFILE_URL = '/api/profiles/'
 LOGIN_URL = '/api/login_user/'
+ME_PROFILE_URL = '/api/profiles/me/'
 
 
 def detail_profile_url(profile_id):
@@ -263,3 +267,73 @@ class ProfileModelTest(TestCase):
 
         self.assertEqual(user_count, 1)
         self.assertEqual(profile_count, 0)
+
+
+class ProfileMeApiTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = TestUserFactory()
+        self.profile = TestProfileFactoryWith(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='JWT {}'.format(RefreshToken.for_user(self.user).access_token))
+
+    def test_should_return_own_profile(self):
+        TestProfileFactoryWith(user=TestUserFactory(email='another_user@sample.com'), sex='women')
+        res = self.client.get(ME_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['id'], str(self.profile.id))
+        self.assertEqual(res.data['username'], self.user.username)
+        self.assertIn('ETag', res)
+
+    def test_should_return_cached_profile_without_db_queries(self):
+        self.client.get(ME_PROFILE_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_PROFILE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_should_return_not_modified_with_matching_etag(self):
+        etag = self.client.get(ME_PROFILE_URL)['ETag']
+        res = self.client.get(ME_PROFILE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_should_invalidate_when_profile_changed(self):
+        etag = self.client.get(ME_PROFILE_URL)['ETag']
+        self.client.patch(detail_profile_url(self.profile.id), {'sex': 'another'})
+        res = self.client.get(ME_PROFILE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['sex'], 'another')
+
+    def test_should_invalidate_when_username_changed(self):
+        self.client.get(ME_PROFILE_URL)
+        self.user.username = 'updated_username'
+        self.user.save()
+        res = self.client.get(ME_PROFILE_URL)
+
+        self.assertEqual(res.data['username'], 'updated_username')
+
+    def test_should_not_return_profile_without_profile(self):
+        self.profile.delete()
+        res = self.client.get(ME_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_should_not_return_profile_by_un_authorized_user(self):
+        self.client.credentials()
+        res = self.client.get(ME_PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedRetrieveMixinTest(SimpleTestCase):
+    def test_should_require_view_to_choose_cache_key(self):
+        class CachedProfileViewSet(CachedRetrieveMixin, viewsets.ReadOnlyModelViewSet):
+            queryset = Profile.objects.all()
+
+        view = CachedProfileViewSet(basename='profile', kwargs={'pk': 'profile_id'})
+
+        with self.assertRaisesMessage(NotImplementedError, 'CachedProfileViewSet must implement get_cache_key()'):
+            view.get_cache_key()
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from .factories.user import TestUserFactory
+from api.profiling import sign_profile_request
+
+PHRASES_URL = '/api/phrases/'
+
+
+def request_profile_url(profile_id):
+    return reverse('api:request_profile', args=[profile_id])
+
+
+def auth_header(user):
+    return 'JWT {}'.format(RefreshToken.for_user(user).access_token)
+
+
+class RequestProfilingTest(TestCase):
+    def setUp(self):
+        self.profile_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_root)
+        settings_override = override_settings(REQUEST_PROFILING_ENABLED=True, REQUEST_PROFILING_ROOT=self.profile_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff = TestUserFactory(email='staff@sample.com')
+        self.staff.is_staff = True
+        self.staff.save()
+        self.user = TestUserFactory()
+        self.client = APIClient()
+
+    def test_should_not_profile_request_without_header(self):
+        res = self.client.get(PHRASES_URL, HTTP_AUTHORIZATION=auth_header(self.staff))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertEqual(os.listdir(self.profile_root), [])
+
+    def test_should_profile_request_by_staff(self):
+        res = self.client.get(PHRASES_URL, HTTP_AUTHORIZATION=auth_header(self.staff), HTTP_X_PROFILE_REQUEST='1')
+        profile_id = res['X-Profile-Id']
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(os.listdir(self.profile_root)), [profile_id + '.prof', profile_id + '.txt'])
+
+    def test_should_not_profile_request_by_not_staff(self):
+        res = self.client.get(PHRASES_URL, HTTP_AUTHORIZATION=auth_header(self.user), HTTP_X_PROFILE_REQUEST='1')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', res)
+
+    def test_should_profile_request_with_signed_header(self):
+        res = self.client.get(PHRASES_URL,
+                              HTTP_AUTHORIZATION=auth_header(self.user),
+                              HTTP_X_PROFILE_REQUEST=sign_profile_request(),
+                              HTTP_X_PROFILE_MEMORY='1')
+        profile_id = res['X-Profile-Id']
+
+        self.assertIn(profile_id + '.mem.txt', os.listdir(self.profile_root))
+
+    def test_should_not_profile_request_with_invalid_signature(self):
+        res = self.client.get(PHRASES_URL,
+                              HTTP_AUTHORIZATION=auth_header(self.user),
+                              HTTP_X_PROFILE_REQUEST=sign_profile_request() + 'x')
+
+        self.assertNotIn('X-Profile-Id', res)
+
+    def test_should_download_profile_by_staff(self):
+        res = self.client.get(PHRASES_URL, HTTP_AUTHORIZATION=auth_header(self.staff), HTTP_X_PROFILE_REQUEST='1')
+        profile_id = res['X-Profile-Id']
+
+        self.client.force_authenticate(user=self.staff)
+        res = self.client.get(request_profile_url(profile_id), {'kind': 'stats'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(b'function calls', b''.join(res.streaming_content))
+
+    def test_should_not_download_profile_by_not_staff(self):
+        self.client.force_authenticate(user=self.user)
+        res = self.client.get(request_profile_url('0' * 32))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_should_not_download_profile_with_not_exists(self):
+        self.client.force_authenticate(user=self.staff)
+        res = self.client.get(request_profile_url('not-a-profile-id'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .factories.comment import TestCommentFactoryWith
+from .factories.phrase import TestPhraseFactoryWith
+from .factories.profile import TestProfileFactoryWith
+from .factories.user import TestUserFactory, UserFactory
+from api.models import Phrase, PhraseTrigram, Comment, Profile, ReviewState, LanguagePairCount, UserPurge
+from api.purge import schedule_user_purge, claim_purge, run_purge
+from api import purge
+
+
+@override_settings(USER_PURGE_BATCH_SIZE=2)
+class UserPurgeTest(TestCase):
+    def setUp(self):
+        self.user = TestUserFactory()
+        self.another_user = UserFactory(username='another_user', email='another_user@sample.com')
+        TestProfileFactoryWith(user=self.user)
+        phrases = [TestPhraseFactoryWith(user=self.user, text='text{}'.format(i)) for i in range(5)]
+        for phrase in phrases:
+            TestCommentFactoryWith(user=self.another_user, phrase=phrase)
+        ReviewState.objects.create(user=self.user, phrase=phrases[0], due_at=timezone.now())
+        self.another_phrase = TestPhraseFactoryWith(user=self.another_user, text='another_text')
+        TestCommentFactoryWith(user=self.user, phrase=self.another_phrase)
+
+    def test_should_deactivate_user_until_purged(self):
+        job = schedule_user_purge(self.user)
+        self.user.refresh_from_db()
+
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(job.status, 'pending')
+        self.assertEqual(Phrase.objects.filter(user=self.user).count(), 5)
+
+    def test_should_purge_user_in_batches(self):
+        schedule_user_purge(self.user)
+
+        with mock.patch.object(purge.transaction, 'atomic', wraps=purge.transaction.atomic) as atomic:
+            job = run_purge(claim_purge())
+
+        self.assertEqual(job.status, 'done')
+        self.assertFalse(get_user_model().objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Phrase.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(Profile.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(PhraseTrigram.objects.filter(phrase__user_id=self.user.pk).exists())
+        self.assertEqual(list(Comment.objects.all()), [])
+        self.assertFalse(ReviewState.objects.exists())
+        self.assertEqual(LanguagePairCount.objects.get().count, 1)
+        self.assertTrue(Phrase.objects.filter(pk=self.another_phrase.pk).exists())
+        self.assertEqual(UserPurge.objects.get().deleted_rows, job.deleted_rows)
+        self.assertGreater(atomic.call_count, 10)
+
+    def test_should_filter_each_step_on_one_indexed_column(self):
+        for queryset in purge.purge_steps(self.user.pk):
+            sql = str(queryset.query).upper()
+
+            self.assertNotIn(' OR ', sql)
+            self.assertNotIn(' JOIN ', sql)
+
+    def test_should_retry_with_backoff_after_failure(self):
+        schedule_user_purge(self.user)
+
+        with mock.patch.object(purge, 'purge_steps', side_effect=RuntimeError('lock wait timeout')):
+            job = run_purge(claim_purge())
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertIn('lock wait timeout', job.last_error)
+        self.assertGreater(job.next_attempt_at, timezone.now())
+        self.assertIsNone(claim_purge())
+
+        UserPurge.objects.update(next_attempt_at=timezone.now())
+        job = run_purge(claim_purge())
+        self.assertEqual((job.status, job.attempts), ('done', 2))
+
+    @override_settings(USER_PURGE_MAX_ATTEMPTS=1)
+    def test_should_give_up_after_max_attempts(self):
+        schedule_user_purge(self.user)
+
+        with mock.patch.object(purge, 'purge_steps', side_effect=RuntimeError('lock wait timeout')):
+            job = run_purge(claim_purge())
+
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNone(claim_purge())
+
+    def test_should_take_over_job_after_lease_expires(self):
+        schedule_user_purge(self.user)
+        claim_purge()
+        self.assertIsNone(claim_purge())
+
+        UserPurge.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        job = claim_purge()
+        self.assertEqual((job.status, job.attempts), ('running', 2))
@@ -0,0 +1,239 @@
+import asyncio
+import json
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .factories.phrase import TestPhraseFactoryWith
+from .factories.user import TestUserFactory
+from api import pubsub
+from api.models import Phrase, Comment
+from api.stream import FEED_CHANNEL, issue_stream_ticket, stream_application, thread_channel
+from friends_phrase.asgi import application
+
+STREAM_TICKET_URL = '/api/stream_tickets/'
+
+
+class ASGIConnection:
+    def __init__(self, app, scope):
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        self.task = asyncio.ensure_future(app(scope, self.inbox.get, self.outbox.put))
+
+    async def receive_output(self, timeout=1):
+        return await asyncio.wait_for(self.outbox.get(), timeout)
+
+    async def disconnect(self, message_type):
+        await self.inbox.put({'type': message_type})
+        await asyncio.wait_for(self.task, 1)
+
+
+def http_scope(path, ticket=None, method='GET', headers=(), query='ticket'):
+    return {'type': 'http', 'method': method, 'path': path, 'headers': list(headers),
+            'query_string': '{}={}'.format(query, ticket).encode() if ticket else b''}
+
+
+def websocket_scope(path, token=None):
+    return {'type': 'websocket', 'path': path, 'headers': [], 'query_string': b'',
+            'subprotocols': ['jwt', token] if token else []}
+
+
+async def wait_for_subscriber(channel):
+    for _ in range(100):
+        if pubsub.get_backend().has_subscribers(channel):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError('nobody subscribed to {}'.format(channel))
+
+
+class LocalBackendTest(TestCase):
+    async def test_should_deliver_published_message_to_subscribers(self):
+        backend = pubsub.LocalBackend()
+        with backend.subscribe('feed') as first, backend.subscribe('feed') as second, \
+                backend.subscribe('other') as other:
+            await asyncio.get_event_loop().run_in_executor(None, backend.publish, 'feed', 'message')
+
+            self.assertEqual(await asyncio.wait_for(first.get(), 1), 'message')
+            self.assertEqual(await asyncio.wait_for(second.get(), 1), 'message')
+            self.assertTrue(other.queue.empty())
+        self.assertFalse(backend.has_subscribers('feed'))
+
+    @override_settings(PUBSUB_QUEUE_SIZE=2)
+    async def test_should_cut_off_subscriber_that_falls_behind(self):
+        backend = pubsub.LocalBackend()
+        with backend.subscribe('feed') as subscription:
+            for number in range(3):
+                backend.publish('feed', str(number))
+            await asyncio.sleep(0)
+
+            self.assertIsNone(await asyncio.wait_for(subscription.get(), 1))
+            self.assertTrue(subscription.overflowed)
+
+    @override_settings(WEB_CONCURRENCY=3)
+    def test_should_warn_when_local_backend_serves_several_processes(self):
+        with mock.patch.object(pubsub, '_backend', None):
+            with self.assertLogs('api.pubsub', 'WARNING') as logs:
+                pubsub.get_backend()
+
+        self.assertIn('3 processes serve the app', logs.output[0])
+
+    def test_should_only_build_message_when_channel_has_subscribers(self):
+        messages = []
+        pubsub.publish(['nobody'], lambda: messages.append('built'))
+
+        self.assertEqual(messages, [])
+
+
+class StreamApplicationTest(TransactionTestCase):
+    def setUp(self):
+        self.user = TestUserFactory()
+        self.access_token = AccessToken.for_user(self.user)
+        self.token = str(self.access_token)
+        self.phrase = TestPhraseFactoryWith(user=self.user)
+
+    async def test_should_stream_feed_events(self):
+        connection = ASGIConnection(stream_application, http_scope(
+            '/api/stream/feed/', issue_stream_ticket(self.access_token),
+            headers=[(b'origin', b'http://localhost:3000')]))
+        start = await connection.receive_output()
+        await wait_for_subscriber(FEED_CHANNEL)
+        pubsub.publish([FEED_CHANNEL], lambda: '{"event": "phrase.created"}')
+        body = await connection.receive_output()
+        await connection.disconnect('http.disconnect')
+
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertIn((b'access-control-allow-origin', b'http://localhost:3000'), start['headers'])
+        self.assertEqual(body['body'], b'data: {"event": "phrase.created"}\n\n')
+        self.assertFalse(pubsub.get_backend().has_subscribers(FEED_CHANNEL))
+
+    @override_settings(STREAM_KEEPALIVE_SECONDS=0.01)
+    async def test_should_send_keepalive_when_idle(self):
+        connection = ASGIConnection(stream_application, http_scope(
+            '/api/stream/feed/', issue_stream_ticket(self.access_token)))
+        await connection.receive_output()
+        body = await connection.receive_output()
+        await connection.disconnect('http.disconnect')
+
+        self.assertEqual(body['body'], b': keepalive\n\n')
+
+    async def test_should_stream_comment_thread_over_websocket(self):
+        channel = thread_channel(self.phrase.id)
+        connection = ASGIConnection(stream_application, websocket_scope(
+            '/api/stream/phrases/{}/comments/'.format(self.phrase.id), self.token))
+        await connection.inbox.put({'type': 'websocket.connect'})
+        accept = await connection.receive_output()
+        await wait_for_subscriber(channel)
+        pubsub.publish([channel], lambda: '{"event": "comment.created"}')
+        message = await connection.receive_output()
+        await connection.disconnect('websocket.disconnect')
+
+        self.assertEqual(accept, {'type': 'websocket.accept', 'subprotocol': 'jwt'})
+        self.assertEqual(message, {'type': 'websocket.send', 'text': '{"event": "comment.created"}'})
+
+    async def test_should_reject_missing_or_invalid_ticket(self):
+        for scope in (http_scope('/api/stream/feed/'), http_scope('/api/stream/feed/', 'invalid'),
+                      http_scope('/api/stream/feed/', self.token, query='token')):
+            connection = ASGIConnection(stream_application, scope)
+            start = await connection.receive_output()
+            await asyncio.wait_for(connection.task, 1)
+
+            self.assertEqual(start['status'], 401)
+
+    async def test_should_redeem_ticket_only_once(self):
+        ticket = issue_stream_ticket(self.access_token)
+        first = ASGIConnection(stream_application, http_scope('/api/stream/feed/', ticket))
+        first_start = await first.receive_output()
+        second = ASGIConnection(stream_application, http_scope('/api/stream/feed/', ticket))
+        second_start = await second.receive_output()
+        await first.disconnect('http.disconnect')
+
+        self.assertEqual(first_start['status'], 200)
+        self.assertEqual(second_start['status'], 401)
+
+    async def test_should_close_websocket_without_token(self):
+        for token in (None, 'invalid'):
+            connection = ASGIConnection(stream_application, websocket_scope('/api/stream/feed/', token))
+            await connection.inbox.put({'type': 'websocket.connect'})
+            close = await connection.receive_output()
+
+            self.assertEqual(close, {'type': 'websocket.close', 'code': 4401})
+
+    async def test_should_close_websocket_for_unknown_phrase(self):
+        connection = ASGIConnection(stream_application, websocket_scope(
+            '/api/stream/phrases/{}/comments/'.format(self.user.id), self.token))
+        await connection.inbox.put({'type': 'websocket.connect'})
+        close = await connection.receive_output()
+
+        self.assertEqual(close, {'type': 'websocket.close', 'code': 4404})
+
+    async def test_should_route_other_paths_to_django(self):
+        connection = ASGIConnection(application, http_scope('/healthz'))
+        await connection.inbox.put({'type': 'http.request', 'body': b''})
+        start = await connection.receive_output()
+        body = await connection.receive_output()
+
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(body['body'], b'ok')
+
+
+class StreamPublishTest(TransactionTestCase):
+    def setUp(self):
+        self.user = TestUserFactory()
+
+    async def test_should_publish_committed_phrases_and_comments(self):
+        phrase = await sync_to_async(TestPhraseFactoryWith, thread_sensitive=True)(user=self.user)
+        with pubsub.subscribe(FEED_CHANNEL) as feed, pubsub.subscribe(thread_channel(phrase.id)) as thread:
+            await sync_to_async(Phrase.objects.create_phrase, thread_sensitive=True)(
+                user=self.user, text='new_text', text_language='en',
+                translated_word='new_translated_word', translated_word_language='jp')
+            created = json.loads(await asyncio.wait_for(feed.get(), 1))
+
+            comment = await sync_to_async(Comment.objects.create_comment, thread_sensitive=True)(
+                text='text', text_language='en', user=self.user, phrase=phrase)
+            commented = json.loads(await asyncio.wait_for(thread.get(), 1))
+
+            comment_id = comment.id
+            await sync_to_async(comment.delete, thread_sensitive=True)()
+            deleted = json.loads(await asyncio.wait_for(thread.get(), 1))
+
+        self.assertEqual(created['event'], 'phrase.created')
+        self.assertEqual(created['data']['translatedWord'], 'new_translated_word')
+        self.assertEqual(commented['event'], 'comment.created')
+        self.assertEqual(commented['data']['id'], str(comment_id))
+        self.assertEqual(deleted, {'event': 'comment.deleted',
+                                   'data': {'id': str(comment_id), 'phrase': str(phrase.id)}})
+
+    def test_should_not_publish_rolled_back_writes(self):
+        backend = pubsub.get_backend()
+        with mock.patch.object(backend, 'has_subscribers', return_value=True), \
+                mock.patch.object(backend, 'publish') as publish:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                TestPhraseFactoryWith(user=self.user)
+                raise RuntimeError
+
+        publish.assert_not_called()
+
+
+class StreamTicketTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = TestUserFactory()
+        self.client = APIClient()
+
+    def test_should_issue_ticket_expiring_with_token(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION='JWT {}'.format(token))
+        res = self.client.post(STREAM_TICKET_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(cache.get('stream-ticket:{}'.format(res.data['ticket'])), token['exp'])
+
+    def test_should_not_issue_ticket_without_token(self):
+        res = self.client.post(STREAM_TICKET_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
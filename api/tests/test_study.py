@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from .factories.phrase import TestPhraseFactoryWith
+from .factories.user import TestUserFactory, UserFactory
+from api.models import ReviewState
+from api.study import schedule
+
+STUDY_DECK_URL = '/api/study/deck/'
+NOW = timezone.make_aware(datetime(2022, 2, 22, 2, 22))
+
+
+class ScheduleTest(SimpleTestCase):
+    def test_should_grow_interval_on_recall(self):
+        state = ReviewState(due_at=NOW)
+
+        self.assertEqual([schedule(state, 5, NOW).interval for _ in range(3)], [1, 6, 16])
+        self.assertEqual(state.repetitions, 3)
+        self.assertAlmostEqual(state.ease, 2.8)
+        self.assertEqual(state.due_at, NOW + timedelta(days=16))
+
+    def test_should_reset_repetitions_on_lapse(self):
+        state = ReviewState(due_at=NOW, interval=16, repetitions=3)
+        schedule(state, 1, NOW)
+
+        self.assertEqual((state.repetitions, state.interval), (0, 1))
+        self.assertAlmostEqual(state.ease, 1.96)
+
+    def test_should_not_drop_ease_below_minimum(self):
+        state = ReviewState(due_at=NOW, ease=1.3)
+
+        self.assertEqual(schedule(state, 0, NOW).ease, 1.3)
+
+
+class StudyDeckApiTest(TestCase):
+    def setUp(self):
+        self.user = TestUserFactory()
+        self.phrases = [TestPhraseFactoryWith(user=self.user, text='text{}'.format(i)) for i in range(4)]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_should_not_return_deck_to_unauthorized_user(self):
+        res = APIClient().get(STUDY_DECK_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_should_return_due_cards_before_unseen_phrases(self):
+        now = timezone.now()
+        ReviewState.objects.create(user=self.user, phrase=self.phrases[2], due_at=now - timedelta(days=1),
+                                   repetitions=1)
+        ReviewState.objects.create(user=self.user, phrase=self.phrases[1], due_at=now - timedelta(days=2),
+                                   repetitions=2)
+        ReviewState.objects.create(user=self.user, phrase=self.phrases[0], due_at=now + timedelta(days=1))
+        TestPhraseFactoryWith(user=UserFactory(username='another_user'), text='another_text')
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(STUDY_DECK_URL, {'size': 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([card['id'] for card in res.data],
+                         [str(self.phrases[1].id), str(self.phrases[2].id), str(self.phrases[3].id)])
+        self.assertEqual([card['repetitions'] for card in res.data], [2, 1, 0])
+        self.assertIsNone(res.data[2]['due_at'])
+        self.assertEqual(len(queries), 2)
+
+    def test_should_not_return_deck_by_invalid_size(self):
+        for size in ('many', '0', '-1'):
+            res = self.client.get(STUDY_DECK_URL, {'size': size})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_should_record_session_results_in_one_request(self):
+        ReviewState.objects.create(user=self.user, phrase=self.phrases[0], due_at=timezone.now(),
+                                   interval=6, repetitions=2)
+        payload = {'results': [{'phrase': str(phrase.id), 'quality': 4} for phrase in self.phrases]}
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(STUDY_DECK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(ReviewState.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(ReviewState.objects.get(phrase=self.phrases[0]).interval, 15)
+        self.assertEqual(ReviewState.objects.get(phrase=self.phrases[1]).interval, 1)
+        writes = [query for query in queries if query['sql'].startswith(('INSERT', 'UPDATE'))]
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(self.client.get(STUDY_DECK_URL).data, [])
+
+    def test_should_reject_results_for_other_users_phrases(self):
+        phrase = TestPhraseFactoryWith(user=UserFactory(username='another_user'), text='another_text')
+        payload = {'results': [{'phrase': str(phrase.id), 'quality': 4}]}
+
+        res = self.client.post(STUDY_DECK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ReviewState.objects.exists())
+
+    def test_should_reject_invalid_quality(self):
+        payload = {'results': [{'phrase': str(self.phrases[0].id), 'quality': 6}]}
+
+        res = self.client.post(STUDY_DECK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
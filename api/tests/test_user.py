@@ -1,11 +1,16 @@
 from datetime import datetime
-from django.test import TestCase
+from io import StringIO
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 from freezegun import freeze_time
 from .factories.user import TestUserFactory
+from api.models import UserPurge
 
 DT = datetime(2022, 2, 22, 2, 22)
 UPDATE_DT = datetime(2022, 3, 22, 2, 22)
@@ -130,8 +135,14 @@ class AuthorizedUserApiTest(TestCase):
     def test_should_delete_user(self):
         self.assertEqual(get_user_model().objects.count(), 1)
         res = self.client.delete(detail_user_url(self.user.id))
+        self.user.refresh_from_db()
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(self.user.is_active)
+        self.assertTrue(UserPurge.objects.filter(user_id=self.user.id, status='pending').exists())
+        self.assertEqual(self.client.get(detail_user_url(self.user.id)).status_code, status.HTTP_404_NOT_FOUND)
+
+        call_command('purge_users', stdout=StringIO())
         self.assertEqual(get_user_model().objects.count(), 0)
 
     def test_should_not_delete_user_by_not_owner(self):
@@ -284,3 +295,41 @@ class UserModelTest(TestCase):
 
         user_count = get_user_model().objects.count()
         self.assertEqual(user_count, 0)
+
+
+class LoginUserCacheTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = TestUserFactory()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='JWT {}'.format(RefreshToken.for_user(self.user).access_token))
+
+    def test_should_return_cached_login_user_without_db_queries(self):
+        self.client.get(LOGIN_USER_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(LOGIN_USER_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['username'], self.user.username)
+
+    def test_should_return_not_modified_with_matching_etag(self):
+        etag = self.client.get(LOGIN_USER_URL)['ETag']
+        res = self.client.get(LOGIN_USER_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_should_invalidate_when_username_changed(self):
+        etag = self.client.get(LOGIN_USER_URL)['ETag']
+        self.user.username = 'updated_username'
+        self.user.save()
+        res = self.client.get(LOGIN_USER_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['username'], 'updated_username')
+
+    def test_should_not_return_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(LOGIN_USER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,84 @@
+import time
+import uuid
+from datetime import datetime
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from freezegun import freeze_time
+from .factories.user import TestUserFactory
+from .factories.phrase import TestPhraseFactoryWith
+from api.fields import BinaryUUIDField
+from api.models import Phrase
+from api.uuids import uuid7
+
+DT = datetime(2022, 2, 22, 2, 22)
+
+
+class Uuid7Test(SimpleTestCase):
+    def test_should_set_version_and_variant(self):
+        value = uuid7()
+
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, 'specified in RFC 4122')
+
+    def test_should_be_time_ordered(self):
+        values = [uuid7() for _ in range(10000)]
+
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
+
+    def test_should_be_time_ordered_within_same_millisecond(self):
+        with freeze_time(DT):
+            values = [uuid7() for _ in range(5000)]
+
+        self.assertEqual([value.hex for value in values], sorted(value.hex for value in values))
+
+    def test_should_embed_unix_milliseconds(self):
+        value = uuid7()
+
+        self.assertAlmostEqual(value.int >> 80, time.time() * 1000, delta=1000)
+
+
+class TimeOrderedPrimaryKeyTest(TestCase):
+    def test_should_order_new_rows_by_creation(self):
+        user = TestUserFactory()
+        first = TestPhraseFactoryWith(user=user, text='first')
+        second = TestPhraseFactoryWith(user=user, text='second')
+
+        self.assertEqual(user.id.version, 7)
+        self.assertLess(first.id.hex, second.id.hex)
+
+
+class MySQLConnection:
+    vendor = 'mysql'
+
+
+class BinaryUUIDFieldTest(SimpleTestCase):
+    def setUp(self):
+        self.field = BinaryUUIDField()
+        self.value = uuid.UUID('0183b6b8-2f4e-7a7c-9c4f-3f2b1a0c9d8e')
+
+    def test_should_use_binary_column_on_mysql(self):
+        self.assertEqual(self.field.db_type(MySQLConnection()), 'binary(16)')
+
+    def test_should_keep_uuid_column_on_other_backends(self):
+        self.assertEqual(self.field.db_type(connection), connection.data_types['UUIDField'])
+
+    def test_should_store_16_bytes_on_mysql(self):
+        self.assertEqual(self.field.get_db_prep_value(self.value, MySQLConnection()), self.value.bytes)
+        self.assertEqual(self.field.get_db_prep_value(str(self.value), MySQLConnection()), self.value.bytes)
+
+    def test_should_read_uuid_from_binary_and_hex(self):
+        self.assertEqual(self.field.from_db_value(self.value.bytes, None, MySQLConnection()), self.value)
+        self.assertEqual(self.field.from_db_value(self.value.hex, None, connection), self.value)
+        self.assertIsNone(self.field.from_db_value(None, None, connection))
+
+
+class BinaryUUIDPrimaryKeyTest(TestCase):
+    def test_should_round_trip_primary_and_foreign_keys(self):
+        phrase = TestPhraseFactoryWith(user=TestUserFactory())
+        loaded = Phrase.objects.select_related('user').get(id=str(phrase.id))
+
+        self.assertIsInstance(loaded.id, uuid.UUID)
+        self.assertIsInstance(loaded.user_id, uuid.UUID)
+        self.assertEqual(loaded.user_id, phrase.user.id)
+        self.assertEqual(loaded.user.id, phrase.user.id)
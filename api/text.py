@@ -0,0 +1,27 @@
+import hashlib
+import re
+import unicodedata
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_text(value):
+    # NFKC folds full-width/half-width forms, which matters for Japanese input.
+    value = unicodedata.normalize('NFKC', value).casefold()
+    return WHITESPACE_PATTERN.sub(' ', value).strip()
+
+
+def text_hash(value):
+    return hashlib.sha256(normalize_text(value).encode()).hexdigest()
+
+
+def trigrams(value):
+    # Pad like pg_trgm so short phrases and word starts still produce trigrams.
+    padded = '  %s ' % normalize_text(value)
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def similarity(grams, other_grams):
+    if not grams or not other_grams:
+        return 0.0
+    return len(grams & other_grams) / len(grams | other_grams)
@@ -14,5 +14,10 @@ urlpatterns = [
     path('login_user/', views.RetrieveLoginUserView.as_view(), name='login_user'),
     path('users/', views.CreateUserView.as_view(), name='create_user'),
     path('users/<uuid:pk>/', views.RetrieveUpdateDestroyUserView.as_view(), name='user'),
+    path('study/deck/', views.StudyDeckView.as_view(), name='study_deck'),
+    path('batch/', views.BatchView.as_view(), name='batch'),
+    path('feed/', views.RecentPhraseFeedView.as_view(), name='feed'),
+    path('stream_tickets/', views.StreamTicketView.as_view(), name='stream_ticket'),
+    path('request_profiles/<str:profile_id>/', views.RetrieveRequestProfileView.as_view(), name='request_profile'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,34 @@
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    """Time-ordered UUID (draft RFC 4122bis version 7).
+
+    The first 48 bits are the Unix time in milliseconds so new rows land at the
+    right edge of the primary key index. The 12-bit rand_a field is used as a
+    counter so ids generated in the same millisecond still sort in order.
+    """
+    global _last_ms, _counter
+
+    with _lock:
+        ms = time.time_ns() // 1000000
+        if ms > _last_ms:
+            _last_ms = ms
+            _counter = int.from_bytes(os.urandom(2), 'big') & 0x7ff
+        else:
+            _counter += 1
+            if _counter > 0xfff:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+    value = (ms & ((1 << 48) - 1)) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+    return uuid.UUID(int=value)
@@ -1,11 +1,35 @@
-from rest_framework import generics, permissions, viewsets
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTTokenUserAuthentication
 from .serializers import UserSerializer, \
     ProfileSerializer, \
     PhraseSerializer, \
     CommentSerializer, \
-    LoginUserSerializer
-from .models import User, Profile, Phrase, Comment
+    LoginUserSerializer, \
+    LanguagePairCountSerializer, \
+    StudyCardSerializer, \
+    ReviewResultsSerializer, \
+    ReviewStateSerializer, \
+    BatchSerializer
+from .models import User, Profile, Phrase, Comment, LanguagePairCount
+from .autocomplete import get_index
+from .batch import run_batch
+from .caching import etag_matches, login_user_cache_key, profile_cache_key
+from .feed import get_feed
+from .mixins import ReplicaReadMixin, CachedRetrieveMixin, IdempotentCreateMixin
+from .pagination import KeysetPagination
 from .permissions import IsOwnerOrReadOnly
+from .profiling import profile_path
+from .purge import schedule_user_purge
+from .search import similar_phrases
+from .stream import issue_stream_ticket
+from .study import build_deck, record_reviews
+from .text import text_hash
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -13,20 +37,33 @@ class CreateUserView(generics.CreateAPIView):
     permission_classes = (permissions.AllowAny,)
 
 
-class RetrieveLoginUserView(generics.RetrieveAPIView):
+class RetrieveLoginUserView(CachedRetrieveMixin, generics.RetrieveAPIView):
     serializer_class = LoginUserSerializer
+    # The user is only loaded from the database on a cache miss.
+    authentication_classes = (JWTTokenUserAuthentication,)
+
+    def get_cache_key(self):
+        return login_user_cache_key(self.request.user.pk)
 
     def get_object(self):
-        return self.request.user
+        # Read the primary so a cache refill never picks up a lagging replica.
+        return get_object_or_404(User.objects.using('default'), pk=self.request.user.pk, is_active=True)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_retrieve(request)
 
 
 class RetrieveUpdateDestroyUserView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = User.objects.all()
+    queryset = User.objects.filter(is_active=True)
     serializer_class = UserSerializer
     permission_classes = (IsOwnerOrReadOnly,)
 
+    def perform_destroy(self, instance):
+        # The cascade can be large, so it runs in the purge_users worker instead of this request.
+        schedule_user_purge(instance)
+
 
-class ProfileViewSet(viewsets.ModelViewSet):
+class ProfileViewSet(ReplicaReadMixin, CachedRetrieveMixin, viewsets.ModelViewSet):
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
     permission_classes = (IsOwnerOrReadOnly,)
@@ -34,20 +71,147 @@ class ProfileViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def get_cache_key(self):
+        return profile_cache_key(self.request.user.pk)
+
+    def get_cached_object(self):
+        # Read the primary so a cache refill never picks up a lagging replica.
+        queryset = Profile.objects.using('default').select_related('user')
+        return get_object_or_404(queryset, user_id=self.request.user.pk, user__is_active=True)
+
+    @action(detail=False, authentication_classes=(JWTTokenUserAuthentication,),
+            permission_classes=(permissions.IsAuthenticated,))
+    def me(self, request):
+        return self.cached_retrieve(request)
+
 
-class PhraseViewSet(viewsets.ModelViewSet):
+class PhraseViewSet(ReplicaReadMixin, IdempotentCreateMixin, viewsets.ModelViewSet):
     queryset = Phrase.objects.all()
     serializer_class = PhraseSerializer
     permission_classes = (IsOwnerOrReadOnly,)
+    filter_fields = ('text_language', 'translated_word_language')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for field in self.filter_fields:
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        exact = self.request.query_params.get('exact')
+        if exact:
+            queryset = queryset.filter(text_hash=text_hash(exact))
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-
-class CommentViewSet(viewsets.ModelViewSet):
+    @action(detail=True, url_path='comments', url_name='comments', pagination_class=KeysetPagination)
+    def comment_thread(self, request, pk=None):
+        comments = Comment.objects.filter(phrase=self.get_object()).select_related('user')
+        page = self.paginate_queryset(comments)
+        return self.get_paginated_response(
+            CommentSerializer(page, many=True, context=self.get_serializer_context()).data)
+
+    @action(detail=False)
+    def similar(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), settings.SIMILAR_PHRASE_MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Ensure this value is greater than or equal to 1.'})
+        exclude_user = request.user if request.user.is_authenticated else None
+        results = similar_phrases(request.query_params.get('q', ''), limit=limit, exclude_user=exclude_user)
+        return Response([
+            {**PhraseSerializer(phrase, context=self.get_serializer_context()).data, 'similarity': score}
+            for score, phrase in results
+        ])
+
+    # Answered from the in-memory index; the token is checked without loading the user.
+    @action(detail=False, authentication_classes=(JWTTokenUserAuthentication,),
+            permission_classes=(permissions.IsAuthenticated,))
+    def autocomplete(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), settings.AUTOCOMPLETE_MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Ensure this value is greater than or equal to 1.'})
+        suggestions = get_index().suggest(request.query_params.get('prefix', ''), limit=limit)
+        return Response([{'text': text, 'weight': weight} for text, weight in suggestions])
+
+    @action(detail=False)
+    def facets(self, request):
+        pair_counts = (LanguagePairCount.objects
+                       .filter(count__gt=0)
+                       .order_by('text_language', 'translated_word_language'))
+        return Response(LanguagePairCountSerializer(pair_counts, many=True).data)
+
+
+class CommentViewSet(ReplicaReadMixin, IdempotentCreateMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = (IsOwnerOrReadOnly,)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+class StudyDeckView(ReplicaReadMixin, generics.GenericAPIView):
+    serializer_class = StudyCardSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        try:
+            size = min(int(request.query_params.get('size', settings.STUDY_DECK_SIZE)), settings.STUDY_DECK_MAX_SIZE)
+        except ValueError:
+            raise ValidationError({'size': 'A valid integer is required.'})
+        if size < 1:
+            raise ValidationError({'size': 'Ensure this value is greater than or equal to 1.'})
+        return Response(self.get_serializer(build_deck(request.user, size), many=True).data)
+
+    def post(self, request):
+        serializer = ReviewResultsSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        states = record_reviews(request.user, serializer.validated_data['results'])
+        return Response(ReviewStateSerializer(states, many=True).data)
+
+
+class BatchView(generics.GenericAPIView):
+    serializer_class = BatchSerializer
+    # Sub-requests enforce their own permissions; the JWT is only checked once, here.
+    permission_classes = (permissions.AllowAny,)
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        responses = run_batch(request, serializer.validated_data['requests'], serializer.validated_data['parallel'])
+        return Response({'responses': responses})
+
+
+class RecentPhraseFeedView(generics.GenericAPIView):
+    # Served entirely from the cache; the token is checked without loading the user.
+    authentication_classes = (JWTTokenUserAuthentication,)
+
+    def get(self, request):
+        entries, etag = get_feed()
+        response = Response(status=status.HTTP_304_NOT_MODIFIED) if etag_matches(request, etag) else Response(entries)
+        response['ETag'] = etag
+        return response
+
+
+class StreamTicketView(generics.GenericAPIView):
+    def post(self, request):
+        return Response({'ticket': issue_stream_ticket(request.auth)}, status=status.HTTP_201_CREATED)
+
+
+class RetrieveRequestProfileView(generics.GenericAPIView):
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request, profile_id):
+        kind = request.query_params.get('kind', 'prof')
+        path = profile_path(profile_id, kind)
+        try:
+            return FileResponse(open(path, 'rb'), as_attachment=kind == 'prof')
+        except (TypeError, FileNotFoundError):
+            raise Http404
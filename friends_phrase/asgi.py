@@ -13,4 +13,17 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'friends_phrase.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from api.stream import STREAM_PATH_PREFIX, stream_application  # noqa: E402 (needs the app registry)
+
+
+async def application(scope, receive, send):
+    # Push streams are long-lived, so they are served here rather than holding a Django request thread.
+    if scope['type'] in ('http', 'websocket') and scope['path'].startswith(STREAM_PATH_PREFIX):
+        await stream_application(scope, receive, send)
+    elif scope['type'] == 'websocket':
+        await receive()
+        await send({'type': 'websocket.close', 'code': 4404})
+    else:
+        await django_application(scope, receive, send)
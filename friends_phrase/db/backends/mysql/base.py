@@ -0,0 +1,58 @@
+from functools import partial
+from django.db.backends.mysql import base
+from friends_phrase.db.pool import get_pool
+
+Database = base.Database
+
+
+def ping(conn):
+    try:
+        conn.ping()
+    except Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def pool_options(self):
+        return self.settings_dict.get('POOL')
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_options:
+            return super().get_new_connection(conn_params)
+        pool = get_pool(self.alias, partial(Database.connect, **conn_params), check=ping, **self.pool_options)
+        return pool.acquire()
+
+    def _close(self):
+        if not self.pool_options or self.connection is None:
+            return super()._close()
+
+        pool = get_pool(self.alias, None, **self.pool_options)
+        try:
+            self.connection.rollback()
+        except Database.Error:
+            pool.discard(self.connection)
+        else:
+            pool.release(self.connection)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        if (self.connection is not None
+                and not self.health_check_done
+                and self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
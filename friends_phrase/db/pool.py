@@ -0,0 +1,89 @@
+import os
+import queue
+import threading
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, size=10, timeout=10.0, check=None):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.check = check
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def created(self):
+        return self._created
+
+    def acquire(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._create_or_wait()
+                if conn is None:
+                    continue
+                return conn
+            if self.check is None or self.check(conn):
+                return conn
+            self.discard(conn)
+
+    def _create_or_wait(self):
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self.connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout('no database connection available within %ss' % self.timeout)
+        if self.check is None or self.check(conn):
+            return conn
+        self.discard(conn)
+        return None
+
+    def release(self, conn):
+        self._idle.put(conn)
+
+    def discard(self, conn):
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self.discard(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, **options):
+    # Pools are per process: connections must never be shared across a fork.
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(connect, **options)
+        return _pools[key]
@@ -0,0 +1,41 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+@contextmanager
+def replica_reads():
+    token = _read_from_replica.set(True)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+def primary_pin_key(user):
+    return 'db:primary_pin:%s' % user.pk
+
+
+def pin_to_primary(user):
+    cache.set(primary_pin_key(user), True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def is_pinned_to_primary(user):
+    return user.is_authenticated and cache.get(primary_pin_key(user), False)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
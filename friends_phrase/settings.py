@@ -48,16 +48,22 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.HealthCheckMiddleware',
+    'api.middleware.RequestProfilingMiddleware',
+    'api.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'api.middleware.ScopedSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ScopedCsrfViewMiddleware',
+    'api.middleware.ScopedAuthenticationMiddleware',
+    'api.middleware.ScopedMessageMiddleware',
+    'api.middleware.ScopedXFrameOptionsMiddleware',
 ]
 
+# The only paths that get the session, CSRF, auth, messages and X-Frame-Options middleware above
+SESSION_PATH_PREFIXES = ('/admin/',)
+
 ROOT_URLCONF = 'friends_phrase.urls'
 
 CORS_ORIGIN_WHITELIST = env.list('CORS_ORIGIN_WHITELIST')
@@ -88,6 +94,22 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Seconds a worker reuses its /readyz result before checking the database, migrations and storage again
+READINESS_CACHE_SECONDS = env.int('READINESS_CACHE_SECONDS', default=5)
+
+# Request profiling
+REQUEST_PROFILING_ENABLED = env.bool('REQUEST_PROFILING_ENABLED', default=False)
+REQUEST_PROFILING_ROOT = env('REQUEST_PROFILING_ROOT', default=os.path.join(BASE_DIR, 'request_profiles'))
+REQUEST_PROFILING_SIGNATURE_MAX_AGE = env.int('REQUEST_PROFILING_SIGNATURE_MAX_AGE', default=60 * 60)
+REQUEST_PROFILING_STATS_LIMIT = 50
+
+# Response compression (gzip, and brotli when installed); bodies under COMPRESSION_MIN_SIZE bytes are sent as is
+COMPRESSION_ENABLED = env.bool('COMPRESSION_ENABLED', default=True)
+COMPRESSION_MIN_SIZE = env.int('COMPRESSION_MIN_SIZE', default=1024)
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_CACHE_TIMEOUT = env.int('COMPRESSION_CACHE_TIMEOUT', default=60 * 60)
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -113,6 +135,91 @@ DATABASES = {
     'default': env.db()
 }
 
+# Safe-method reads of the phrase, comment and profile APIs go to these aliases.
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[])):
+    alias = 'replica_%d' % index
+    DATABASES[alias] = env.db_url_config(replica_url)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['friends_phrase.db.routers.PrimaryReplicaRouter']
+DATABASE_REPLICA_STICKY_SECONDS = env.int('DATABASE_REPLICA_STICKY_SECONDS', default=5)
+
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = env.int('DATABASE_CONN_MAX_AGE', default=60)
+    database['CONN_HEALTH_CHECKS'] = env.bool('DATABASE_CONN_HEALTH_CHECKS', default=True)
+
+    if database['ENGINE'] == 'django.db.backends.mysql':
+        database['ENGINE'] = 'friends_phrase.db.backends.mysql'
+        if env.bool('DATABASE_POOL', default=False):
+            # Connections go back to the pool at the end of every request instead of being kept per thread.
+            database['CONN_MAX_AGE'] = 0
+            database['POOL'] = {
+                'size': env.int('DATABASE_POOL_SIZE', default=10),
+                'timeout': env.float('DATABASE_POOL_TIMEOUT', default=10.0),
+            }
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://')
+}
+
+# Number of pre-serialized phrases kept for /api/feed/
+FEED_SIZE = env.int('FEED_SIZE', default=50)
+# Reject a phrase whose normalized text the same user has already saved
+PHRASE_REJECT_DUPLICATES = env.bool('PHRASE_REJECT_DUPLICATES', default=False)
+# Bounds on the trigram index scan behind /api/phrases/similar/
+SIMILAR_PHRASE_MAX_QUERY_TRIGRAMS = 32
+SIMILAR_PHRASE_POSTINGS_LIMIT = env.int('SIMILAR_PHRASE_POSTINGS_LIMIT', default=2000)
+SIMILAR_PHRASE_CANDIDATE_FACTOR = 5
+SIMILAR_PHRASE_MAX_LIMIT = 50
+# Seconds a worker serves its in-memory /api/phrases/autocomplete/ index before checking for other workers' writes
+AUTOCOMPLETE_REFRESH_SECONDS = env.int('AUTOCOMPLETE_REFRESH_SECONDS', default=60)
+AUTOCOMPLETE_MAX_LIMIT = 20
+# Cards per /api/study/deck/ session, and the most a client may ask for or submit at once
+STUDY_DECK_SIZE = 20
+STUDY_DECK_MAX_SIZE = 100
+# Sub-requests accepted by /api/batch/, and threads used when they are run in parallel
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = env.int('BATCH_MAX_WORKERS', default=4)
+# Outgoing email is queued in OutboxEmail and delivered by send_outbox through OUTBOX_EMAIL_BACKEND
+EMAIL_CONFIG = env.email_url('EMAIL_URL', default='smtp://localhost:25')
+OUTBOX_EMAIL_BACKEND = EMAIL_CONFIG['EMAIL_BACKEND']
+EMAIL_HOST = EMAIL_CONFIG['EMAIL_HOST']
+EMAIL_PORT = EMAIL_CONFIG['EMAIL_PORT']
+EMAIL_HOST_USER = EMAIL_CONFIG['EMAIL_HOST_USER']
+EMAIL_HOST_PASSWORD = EMAIL_CONFIG['EMAIL_HOST_PASSWORD']
+EMAIL_USE_TLS = EMAIL_CONFIG.get('EMAIL_USE_TLS', False)
+EMAIL_USE_SSL = EMAIL_CONFIG.get('EMAIL_USE_SSL', False)
+EMAIL_FILE_PATH = EMAIL_CONFIG['EMAIL_FILE_PATH']
+EMAIL_BACKEND = 'api.mail.OutboxEmailBackend'
+DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='webmaster@localhost')
+OUTBOX_BATCH_SIZE = env.int('OUTBOX_BATCH_SIZE', default=100)
+OUTBOX_LEASE_SECONDS = 10 * 60
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_SECONDS = 60
+# Background deletion of users: rows per committed batch, how long a worker owns a job, and retry backoff
+USER_PURGE_BATCH_SIZE = env.int('USER_PURGE_BATCH_SIZE', default=500)
+USER_PURGE_LEASE_SECONDS = 10 * 60
+USER_PURGE_MAX_ATTEMPTS = 5
+USER_PURGE_RETRY_SECONDS = 60
+# Push channels under /api/stream/ (see friends_phrase/asgi.py): fan-out backend, per-connection buffer
+# and how often an idle Server-Sent Events stream gets a keep-alive comment
+PUBSUB_BACKEND = env('PUBSUB_BACKEND', default='api.pubsub.LocalBackend')
+# Server processes serving the app; gunicorn.conf.py sets it from its worker count
+WEB_CONCURRENCY = env.int('WEB_CONCURRENCY', default=1)
+PUBSUB_QUEUE_SIZE = env.int('PUBSUB_QUEUE_SIZE', default=100)
+STREAM_KEEPALIVE_SECONDS = env.int('STREAM_KEEPALIVE_SECONDS', default=15)
+# How long a ticket for opening an event stream stays redeemable
+STREAM_TICKET_SECONDS = 30
+# How long a POST response is kept for replay under its Idempotency-Key, and how long a request may hold the key
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60)
+IDEMPOTENCY_LOCK_SECONDS = 30
+# Admin changelists stop counting rows here and fall back to the database's row estimate
+ADMIN_EXACT_COUNT_LIMIT = 10000
+# Seconds /api/login_user/ and /api/profiles/me/ stay cached without a write
+ME_CACHE_TIMEOUT = env.int('ME_CACHE_TIMEOUT', default=60 * 60)
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -150,8 +257,8 @@ USE_TZ = False
 
 
 # Django-Storage
-DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
-STATICFILES_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+DEFAULT_FILE_STORAGE = 'friends_phrase.storage.LazyS3Storage'
+STATICFILES_STORAGE = 'friends_phrase.storage.LazyS3Storage'
 
 # AWS-Settings
 AWS_S3_REGION_NAME = 'ap-northeast-1'
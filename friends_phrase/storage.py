@@ -0,0 +1,38 @@
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.exceptions import SuspiciousOperation
+from django.utils.encoding import filepath_to_uri
+from django.utils.functional import LazyObject, empty
+from storages.utils import clean_name, safe_join
+
+
+class LazyS3Storage(LazyObject):
+    """S3Boto3Storage that imports boto3 and builds its client on first real use.
+
+    Importing storages.backends.s3boto3 alone costs a few hundred milliseconds
+    per process. Most requests only need file URLs, and with
+    AWS_S3_CUSTOM_DOMAIN those are plain strings, so url() builds them here the
+    way S3Boto3Storage does without loading it.
+    """
+
+    def _setup(self):
+        from storages.backends.s3boto3 import S3Boto3Storage
+        self._wrapped = S3Boto3Storage()
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        custom_domain = getattr(settings, 'AWS_S3_CUSTOM_DOMAIN', None)
+        if not custom_domain or getattr(settings, 'AWS_CLOUDFRONT_KEY', None):
+            if self._wrapped is empty:
+                self._setup()
+            return self._wrapped.url(name, parameters, expire, http_method)
+
+        try:
+            name = safe_join(getattr(settings, 'AWS_LOCATION', ''), clean_name(name))
+        except ValueError:
+            raise SuspiciousOperation("Attempted access to '%s' denied." % name)
+        return '{}//{}/{}{}'.format(
+            getattr(settings, 'AWS_S3_URL_PROTOCOL', 'https:'),
+            custom_domain,
+            filepath_to_uri(name),
+            '?{}'.format(urlencode(parameters)) if parameters else '',
+        )
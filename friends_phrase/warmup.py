@@ -0,0 +1,31 @@
+from django.db import connections
+from django.urls import get_resolver, reverse
+
+
+def load_code():
+    """Import everything the URLconf reaches, so preload_app shares it copy-on-write across workers.
+
+    Runs in the gunicorn master and must not touch the database: a connection
+    opened before the fork would be shared by every worker.
+    """
+    get_resolver().url_patterns
+
+
+def warm_worker():
+    """Get a freshly forked worker ready to serve its first request quickly.
+
+    Runs in the worker's main thread, which never serves a request under
+    gthread, so it must not keep any connection of its own: pooled ones go
+    back to the pool for the request threads and the rest are closed.
+    """
+    from api import autocomplete, feed
+
+    for connection in connections.all():
+        if connection.settings_dict.get('POOL'):
+            connection.ensure_connection()
+
+    # Builds the resolver's reverse and namespace lookups.
+    reverse('api:phrase-list')
+    feed.get_feed()
+    autocomplete.get_index()
+    connections.close_all()
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+
+WORKER_MEMORY_MB = int(os.environ.get('GUNICORN_WORKER_MEMORY_MB', 256))
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+def available_memory_mb():
+    # A container's cgroup limit (v2, then v1) takes precedence over the host's memory.
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                limit = f.read().strip()
+        except OSError:
+            continue
+        if limit.isdigit() and int(limit) < 1 << 60:
+            return int(limit) // (1024 * 1024)
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+
+
+def default_workers():
+    # The usual 2 * cores + 1, unless that many workers would not fit in memory.
+    return max(1, min(2 * available_cores() + 1, available_memory_mb() // WORKER_MEMORY_MB))
+
+
+# GUNICORN_ASGI=1 serves friends_phrase.asgi on uvicorn workers, which adds the push streams under /api/stream/.
+# A stream only sees writes made in its own worker unless PUBSUB_BACKEND is shared between them, so with the
+# default backend run a single ASGI worker for the whole API (see api.pubsub.get_backend).
+asgi = os.environ.get('GUNICORN_ASGI', '').lower() in ('1', 'true', 'yes')
+wsgi_app = 'friends_phrase.asgi:application' if asgi else 'friends_phrase.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:%s' % os.environ.get('PORT', '8000'))
+workers = int(os.environ.get('GUNICORN_WORKERS', default_workers()))
+# Tells the app how many processes serve it.
+os.environ['WEB_CONCURRENCY'] = str(workers)
+# Requests mostly wait on MySQL, S3 and the cache, so a few threads per worker cover that I/O.
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+if asgi:
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot build up; the jitter keeps them from restarting together.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+accesslog = '-'
+
+
+def when_ready(server):
+    from friends_phrase.warmup import load_code
+    load_code()
+
+
+def post_fork(server, worker):
+    from friends_phrase.warmup import warm_worker
+    try:
+        warm_worker()
+    except Exception:
+        # A cold worker is still better than one that cannot boot.
+        worker.log.exception('Worker warm-up failed')